@@ -0,0 +1,153 @@
+# Script which analyzes a packed font file (.pf), or a font definition file and its character bitmaps, and reports
+# how much of the glyph data is useful: payload and padding bits, blank rows and columns and duplicate glyphs.
+# It also estimates the size of the font under alternative glyph encodings, to choose the cheapest layout per font.
+#
+# Reading a font definition file (.json) depends on the Pillow (PIL) library, available here: https://pillow.readthedocs.io/en/stable/index.html#
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+import argparse
+import json
+import os
+import packed_font_file
+from packed_font_file import len_in_bytes, decode_rows
+
+class Glyph:
+    def __init__(self, code, width, height, rows):
+        self.code = code
+        self.width = width
+        self.height = height
+        self.rows = rows        # One int per row, with bit (width - 1 - n) holding column n
+
+def read_packed_font(filename):
+    default_character, characters, bitstream = packed_font_file.read_packed_font(filename)
+    glyphs = [Glyph(chr(code), width, height, decode_rows(glyph, width, height, bitstream)) for code, width, height, glyph in characters]
+    return glyphs, 'bit_continuous' if bitstream else 'byte_rows'
+
+def read_font_definition(filename):
+    from PIL import Image
+    with open(filename) as f:
+        font_info = json.load(f)
+    folder = os.path.dirname(filename)
+    glyphs = []
+    for character in font_info["Characters"]:
+        code = character["Code"]
+        width = character["Width"] if "Width" in character else font_info["Width"]
+        height = character["Height"] if "Height" in character else font_info["Height"]
+        bitmap_filename = character["Filename"] if "Filename" in character else f"{code}.bmp"
+        im = Image.open(os.path.join(folder, bitmap_filename))
+        image_data = list(im.getdata())
+        rows = []
+        for i in range(height):
+            row = 0
+            for b in image_data[i * im.size[0]:i * im.size[0] + width]:
+                row = (row << 1) | (1 if b > 0 else 0)
+            rows.append(row)
+        glyphs.append(Glyph(code, width, height, rows))
+    return glyphs, None
+
+def bounding_box(glyph):
+    """ Return the (left, top, width, height) of the set pixels in a glyph, or None if the glyph is blank."""
+    used_rows = [i for i, row in enumerate(glyph.rows) if row]
+    if not used_rows:
+        return None
+    all_columns = 0
+    for row in glyph.rows:
+        all_columns |= row
+    used_columns = [j for j in range(glyph.width) if (all_columns >> (glyph.width - 1 - j)) & 1]
+    return used_columns[0], used_rows[0], used_columns[-1] - used_columns[0] + 1, used_rows[-1] - used_rows[0] + 1
+
+def rle_size(glyph):
+    """ Size in bytes of the glyph bits (row major) as alternating runs of 0s and 1s, starting with 0s, each run length in 1 byte."""
+    size = 0
+    run = 0
+    current = 0
+    for row in glyph.rows:
+        for j in range(glyph.width):
+            bit = (row >> (glyph.width - 1 - j)) & 1
+            if bit != current:
+                size += 1 + run // 256      # A run longer than 255 is split with zero length runs of the other color
+                run = 0
+                current = bit
+            run += 1
+    return size + 1 + run // 256
+
+def analyze_glyph(glyph, current):
+    payload_bits = glyph.width * glyph.height
+    box = bounding_box(glyph)
+    left, top, width, height = box if box else (0, 0, 0, 0)
+    all_columns = 0
+    for row in glyph.rows:
+        all_columns |= row
+    stats = {
+        'payload_bits' : payload_bits,
+        'set_bits' : sum(bin(row).count('1') for row in glyph.rows),
+        'blank_rows' : sum(1 for row in glyph.rows if not row),
+        'blank_columns' : glyph.width - bin(all_columns).count('1'),
+        # Estimated glyph data size in bytes for each encoding
+        'byte_rows' : len_in_bytes(glyph.width) * glyph.height,
+        'bit_continuous' : len_in_bytes(payload_bits),
+        'cropped' : len_in_bytes(width) * height + 2,       # Plus x and y offsets of the cropped box
+        'vlsb' : glyph.width * len_in_bytes(glyph.height),
+        'rle' : rle_size(glyph),
+    }
+    stats['padding_bits'] = stats[current] * 8 - payload_bits    # Bits stored in the current layout which aren't part of the glyph
+    return stats
+
+ENCODINGS = {
+    'byte_rows' : 'Byte aligned rows',
+    'bit_continuous' : 'Bit continuous',
+    'cropped' : 'Cropped to bounding box',
+    'vlsb' : 'Vertical bytes (VLSB)',
+    'rle' : 'Run length encoded',
+}
+
+def analyze_font(filename, verbose):
+    glyphs, current = read_font_definition(filename) if filename.endswith('.json') else read_packed_font(filename)
+    current = current or 'byte_rows'    # pack-font.py packs byte aligned rows by default
+    header_bytes = 4 + 5 * len(glyphs)
+    totals = {}
+    duplicates = {}     # (width, height, rows) -> codes of glyphs with identical data
+    if verbose:
+        print(f'{"Code":>6}{"Size":>8}{"Payload":>9}{"Padding":>9}{"Blank rows":>12}{"Blank cols":>12}')
+    for glyph in glyphs:
+        stats = analyze_glyph(glyph, current)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        duplicates.setdefault((glyph.width, glyph.height, tuple(glyph.rows)), []).append(glyph.code)
+        if verbose:
+            print(f'{glyph.code!r:>6}{f"{glyph.width}x{glyph.height}":>8}{stats["payload_bits"]:9}{stats["padding_bits"]:9}{stats["blank_rows"]:12}{stats["blank_columns"]:12}')
+
+    duplicate_groups = [codes for codes in duplicates.values() if len(codes) > 1]
+    duplicate_bytes = 0
+    for (width, height, rows), codes in duplicates.items():
+        duplicate_bytes += (len(codes) - 1) * analyze_glyph(Glyph(codes[0], width, height, list(rows)), current)[current]
+
+    stored_bits = totals[current] * 8
+    print(f'{filename}: {len(glyphs)} glyphs, {header_bytes} header bytes, {totals[current]} glyph data bytes')
+    print(f'    Payload bits: {totals["payload_bits"]} ({totals["payload_bits"] * 100 // max(stored_bits, 1)}% of stored bits), set bits: {totals["set_bits"]}')
+    print(f'    Padding bits: {totals["padding_bits"]} ({totals["padding_bits"] * 100 // max(stored_bits, 1)}% of stored bits)')
+    print(f'    Blank rows: {totals["blank_rows"]}, blank columns: {totals["blank_columns"]}')
+    if duplicate_groups:
+        print(f'    Duplicate glyphs: {", ".join("=".join(repr(code) for code in codes) for codes in duplicate_groups)} ({duplicate_bytes} bytes could be shared)')
+
+    print('    Estimated file size by glyph encoding:')
+    sizes = {}
+    for key, description in ENCODINGS.items():
+        sizes[key] = header_bytes + totals[key]
+        print(f'        {description:30}{sizes[key]:8} bytes{" (current)" if key == current else ""}')
+    best = min(sizes, key=lambda key: sizes[key])
+    print(f'    Recommended layout: {ENCODINGS[best]} ({sizes[current] - sizes[best]} bytes smaller than the current layout)')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Analyze the glyph data of a packed font and estimate its size under alternative encodings.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--verbose', help='Output the analysis of each glyph.', action='store_true')
+    parser.add_argument('fontPathnames', nargs='+', help='Packed font files (.pf) or json font definition files to analyze.')
+    args = parser.parse_args()
+
+    for font_pathname in args.fontPathnames:
+        analyze_font(font_pathname, args.verbose)
@@ -14,11 +14,9 @@ import json
 from PIL import Image
 import os
 import sys
+from packed_font_file import len_in_bytes
 
-def len_in_bytes(pixels):
-    return int((pixels + 7) / 8)
-
-def create_packed_font(font_info_filename, verbose):
+def create_packed_font(font_info_filename, verbose, bitstream):
     with open(font_info_filename) as f:
         font_info = json.load(f)
 
@@ -31,7 +29,7 @@ def create_packed_font(font_info_filename, verbose):
     print(f'Creating font {name}, size {default_width}x{default_height} with {character_count} characters.')
 
     # Packed font format
-    # Header - 'PF' (2 bytes)
+    # Header - 'PF' (2 bytes), or 'PB' when the character data is packed as a bitstream
     #        - Default Character (1 byte)
     #        - Number of characters (1 byte)
     #        - Character 1..n
@@ -40,8 +38,10 @@ def create_packed_font(font_info_filename, verbose):
     #               Height (1 byte)
     #               StartIndex of character data (2 bytes)
     # Character data[bytes]
+    #   'PF' - Each row of a character is padded to a whole number of bytes.
+    #   'PB' - The rows of a character are packed as one continuous bitstream, which is padded to a whole number of bytes.
 
-    header = [ord('P'), ord('F'), ord(default_character), character_count ]
+    header = [ord('P'), ord('B') if bitstream else ord('F'), ord(default_character), character_count ]
     data = []
     start_index = 0
 
@@ -67,17 +67,23 @@ def create_packed_font(font_info_filename, verbose):
 
 
         image_data = list(im.getdata())
+        bits = []
         for i in range(height):
             row = image_data[i*image_width:i*image_width + image_width]
             row = [1 if b > 0 else 0 for b in row]
             if verbose:
                 print(row)
-            for b in range(len_in_bytes(width)):
-                val = 0
-                for c in range(8):
-                    val = val + (row[b*8 + c] << (7-c))
-                data.append(val)
-        start_index += len_in_bytes(width) * height
+            if bitstream:
+                bits += row[:width]
+            else:
+                bits += (row + [0] * 8)[:len_in_bytes(width) * 8]
+        bits += [0] * (len_in_bytes(len(bits)) * 8 - len(bits))
+        for b in range(0, len(bits), 8):
+            val = 0
+            for c in range(8):
+                val = val + (bits[b + c] << (7-c))
+            data.append(val)
+        start_index += len(bits) // 8
 
     with open(name, 'wb') as f:
         f.write(bytes(header))
@@ -87,13 +93,14 @@ def create_packed_font(font_info_filename, verbose):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate a Packed Font file.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('--verbose', help='Output each character as an array of 0s and 1s.', action='store_true')
+    parser.add_argument('--bitstream', help='Pack the rows of each character as a continuous bitstream, without padding each row to a whole byte.', action='store_true')
     parser.add_argument('fontPathname', help='The path to the json font definition file.')
     args = parser.parse_args()
 
     currentDir = os.path.curdir
     os.chdir(os.path.dirname(args.fontPathname))
     try:
-        create_packed_font(os.path.basename(args.fontPathname), args.verbose)
+        create_packed_font(os.path.basename(args.fontPathname), args.verbose, args.bitstream)
     finally:
         os.chdir(currentDir)    # Ensure the current directory is restored, even when an exception is thrown
 
@@ -0,0 +1,77 @@
+# Helper functions shared by the scripts in this folder, to read packed font files (.pf) and decode their glyphs.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+import sys
+
+def len_in_bytes(pixels):
+    return int((pixels + 7) / 8)
+
+def glyph_size(width, height, bitstream):
+    """ Get the number of bytes of glyph data of a character.
+
+    Args:
+        width (int): Width of the character in pixels.
+        height (int): Height of the character in pixels.
+        bitstream (bool): True if rows are packed as a continuous bitstream, False if each row is padded to whole bytes.
+
+    Returns:
+        int: Number of bytes of glyph data.
+    """
+    return len_in_bytes(width * height) if bitstream else len_in_bytes(width) * height
+
+def decode_rows(glyph, width, height, bitstream):
+    """ Decode the glyph data of a character into rows of pixels.
+
+    Args:
+        glyph (bytes): Glyph data of the character.
+        width (int): Width of the character in pixels.
+        height (int): Height of the character in pixels.
+        bitstream (bool): True if rows are packed as a continuous bitstream, False if each row is padded to whole bytes.
+
+    Returns:
+        list: One int per row, with bit (width - 1 - n) holding column n.
+    """
+    rows = []
+    if bitstream:
+        size = len_in_bytes(width * height)
+        bits = int.from_bytes(glyph[:size], 'big') >> (size * 8 - width * height)
+        for row in range(height):
+            rows.append((bits >> ((height - 1 - row) * width)) & ((1 << width) - 1))
+    else:
+        width_in_bytes = len_in_bytes(width)
+        for row in range(height):
+            row_index = row * width_in_bytes
+            rows.append(int.from_bytes(glyph[row_index:row_index + width_in_bytes], 'big') >> (width_in_bytes * 8 - width))
+    return rows
+
+def read_packed_font(filename):
+    """ Read a packed font file, exiting if it isn't in the packed font format.
+
+    Args:
+        filename (string): Path of the packed font file.
+
+    Returns:
+        tuple: The default character, a list of (code, width, height, glyph data) per character and
+               True if rows are packed as a continuous bitstream ('PB') rather than padded to whole bytes ('PF').
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if len(data) < 4 or data[0:2] not in (b'PF', b'PB'):
+        sys.exit(f'{filename} has an unknown file format')
+    bitstream = data[1] == ord('B')
+    default_character = chr(data[2])
+    character_count = data[3]
+    glyph_data = data[4 + character_count * 5:]
+    characters = []
+    index = 4
+    for i in range(character_count):
+        code, width, height = data[index], data[index + 1], data[index + 2]
+        start_index = data[index + 3] + data[index + 4] * 256
+        characters.append((code, width, height, glyph_data[start_index:start_index + glyph_size(width, height, bitstream)]))
+        index += 5
+    return default_character, characters, bitstream
@@ -0,0 +1,97 @@
+# Script which pre-renders fixed strings (e.g. titles, units and menu items) in a packed font and saves them to a
+# companion precompiled strings file (.ps) for use on a Pico Pi SSD1306 display.
+#
+# When a font is loaded, packed_font also loads its .ps file (if present). Rendering or measuring a string which
+# exactly matches a precompiled string then draws the whole string as a single block, without rendering each character.
+#
+# Strings are given as font=text pairs with --string, or as a json file mapping each font name to a list of strings
+# (e.g. { "text-16" : [ "Temperature", "Humidity" ], "digits-30" : [ "-" ] }).
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+import argparse
+import json
+import os
+import sys
+import packed_font_file
+from packed_font_file import len_in_bytes, decode_rows
+
+def read_packed_font(filename):
+    """ Read a packed font, returning its default character and a dictionary of character -> (width, height, rows)."""
+    default_character, characters, bitstream = packed_font_file.read_packed_font(filename)
+    return default_character, { chr(code) : (width, height, decode_rows(glyph, width, height, bitstream)) for code, width, height, glyph in characters }
+
+def render_string(text, default_character, characters):
+    """ Render a string the same as packed_font.text(), returning its width, height and MONO_VLSB bitmap."""
+    glyphs = [characters.get(char, characters[default_character]) for char in text]
+    width = sum(glyph[0] for glyph in glyphs)
+    height = max(glyph[1] for glyph in glyphs)
+    pages = len_in_bytes(height)
+    data = bytearray(width * pages)
+    x = 0
+    for char_width, char_height, rows in glyphs:
+        for i, row in enumerate(rows):
+            for j in range(char_width):
+                if (row >> (char_width - 1 - j)) & 1:
+                    data[(i >> 3) * width + x + j] |= 1 << (i & 7)
+        x += char_width
+    return width, height, data
+
+def precompile_strings(font_name, strings, fonts_folder, output_folder):
+    input_filename = os.path.join(fonts_folder, f'{font_name}.pf')
+    if not os.path.exists(input_filename):
+        print(f'{font_name}: {input_filename} not found.')
+        return
+    if len(strings) > 255:
+        sys.exit(f'{font_name}: at most 255 strings can be precompiled per font.')
+    default_character, characters = read_packed_font(input_filename)
+
+    # Precompiled strings format
+    # Header - 'PS' (2 bytes)
+    #        - Number of strings (1 byte)
+    #        - String 1..n
+    #               Length of the text in bytes (1 byte)
+    #               Text, UTF-8 encoded
+    #               Width (2 bytes)
+    #               Height (1 byte)
+    #               Bitmap data, MONO_VLSB (width * pages bytes)
+
+    output = bytearray([ord('P'), ord('S'), len(strings)])
+    for text in strings:
+        encoded = text.encode('utf-8')
+        width, height, data = render_string(text, default_character, characters)
+        if len(encoded) > 255 or width > 65535:
+            sys.exit(f'{font_name}: {text!r} is too long to precompile.')
+        output += bytes([len(encoded)]) + encoded + bytes([width % 256, width >> 8, height]) + data
+        print(f'    {text!r}: {width}x{height}, {len(data)} bytes')
+    output_filename = os.path.join(output_folder, f'{font_name}.ps')
+    with open(output_filename, 'wb') as f:
+        f.write(output)
+    print(f'{font_name}: {len(strings)} strings precompiled to {output_filename} ({len(output)} bytes).')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pre-render fixed strings in packed fonts.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--string', help='A string to precompile in a font (e.g. text-16=Temperature).', action='append', default=[])
+    parser.add_argument('--list', help='Json file mapping each font name to a list of strings to precompile.', default=None)
+    parser.add_argument('--fonts', help='Folder containing the packed font files.', default='.')
+    parser.add_argument('--output', help='Folder to write the precompiled strings files to. Defaults to the fonts folder.', default=None)
+    args = parser.parse_args()
+
+    font_strings = {}
+    if args.list:
+        with open(args.list, encoding='utf-8') as f:
+            for font_name, strings in json.load(f).items():
+                font_strings.setdefault(font_name, []).extend(strings)
+    for pair in args.string:
+        font_name, _, text = pair.partition('=')
+        font_strings.setdefault(font_name, []).append(text)
+
+    output_folder = args.output or args.fonts
+    os.makedirs(output_folder, exist_ok=True)
+    for font_name in sorted(font_strings):
+        strings = list(dict.fromkeys(text for text in font_strings[font_name] if text))     # Drop empty and duplicate strings, keeping their order
+        precompile_strings(font_name, strings, args.fonts, output_folder)
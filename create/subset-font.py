@@ -0,0 +1,195 @@
+# Script which scans MicroPython application source for the text rendered in each packed font and
+# creates subset packed font files (.pf) containing only the characters needed.
+#
+# Text is found by following calls to select_font('font-name'), text('literal', ...) and layout_text('literal', ...) in source order,
+# as well as Marquee, Label, Icon, NumericReadout and Sprite widgets and the set_text() calls of Label and NumericReadout widgets.
+# Text which isn't a string literal (e.g. sensor readings), or is rendered in a font which isn't a string literal, can't be found
+# this way and is reported, so characters for dynamic content are supplied with --extra (e.g. --extra digits-30=0123456789.-).
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+import argparse
+import ast
+import os
+from packed_font_file import read_packed_font
+
+UNKNOWN_FONT = 'unknown font'     # Font given by an expression rather than a string literal
+
+# Calls which render text: name -> (index and keyword of the text argument, index and keyword of the font name argument, default text)
+# Widgets take a font name, while text() and layout_text() render in the selected font unless a font=get_font('font-name') argument is given.
+# render_lines() isn't listed, as it renders lines returned by layout_text().
+TEXT_CALLS = {
+    'text' : (0, 'text', None, 'font', None),
+    'layout_text' : (0, 'text', None, 'font', None),
+    'Label' : (3, 'text', 4, 'font_name', None),
+    'Icon' : (4, 'glyph', 3, 'font_name', None),
+    'NumericReadout' : (4, 'charset', 3, 'font_name', '0123456789.-'),
+    'Sprite' : (4, 'frames', 3, 'font_name', None),
+    'Marquee' : (1, 'text', None, None, None)
+}
+WIDGETS = ('Label', 'NumericReadout')   # Widgets whose text is changed by set_text()
+
+class TextFinder(ast.NodeVisitor):
+    """ Visit the calls in a source file in order, recording the characters rendered in each font."""
+    def __init__(self, filename, font_chars):
+        self.filename = filename
+        self.font_chars = font_chars
+        self.current_font = None
+        self.widget_fonts = {}  # Source of each variable holding a widget (e.g. 'self.clock') -> font name
+        self.dynamic = []       # (filename, line, font) of text which isn't a string literal, or is in an unknown font
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        call = node.value
+        if isinstance(call, ast.Call) and self._name(call) in WIDGETS:
+            font = self._argument(call, *TEXT_CALLS[self._name(call)][2:4])
+            for target in node.targets:
+                self.widget_fonts[ast.unparse(target)] = self._font(font)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)    # Visit arguments first, as they are evaluated before the call
+        name = self._name(node)
+        if name == 'select_font' and node.args:
+            self.current_font = self._font(node.args[0])
+        elif name == 'set_text' and isinstance(node.func, ast.Attribute) and node.args:
+            self._add_text(node.args[0], self.widget_fonts.get(ast.unparse(node.func.value), UNKNOWN_FONT), node)
+        elif name in TEXT_CALLS:
+            text_index, text_keyword, font_index, font_keyword, default = TEXT_CALLS[name]
+            if name in ('text', 'layout_text') and isinstance(node.func, ast.Attribute) and getattr(node.func.value, 'id', None) == 'packed_font':
+                # packed_font.text(display, text, ..., font) and packed_font.layout_text(text, ..., font)
+                text_index, font_index = (1, 9) if name == 'text' else (0, 8)
+            text = self._argument(node, text_index, text_keyword)
+            if text is None and default is not None:
+                text = ast.Constant(default)
+            if text is None:
+                return
+            font = self._argument(node, font_index, font_keyword)
+            if font is None:
+                font = self.current_font if font_keyword == 'font' or font_keyword is None else None
+            else:
+                font = self._font(font)
+            self._add_text(text, font, node)
+
+    def _name(self, node):
+        return node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, 'id', None)
+
+    def _argument(self, node, index, keyword):
+        for argument in node.keywords:
+            if keyword and argument.arg == keyword:
+                return argument.value
+        if index is not None and len(node.args) > index:
+            return node.args[index]
+        return None
+
+    def _font(self, node):
+        """ The font name given by a string literal, None or get_font('font-name'), otherwise UNKNOWN_FONT."""
+        if isinstance(node, ast.Call) and self._name(node) == 'get_font' and node.args:
+            node = node.args[0]
+        if isinstance(node, ast.Constant) and (node.value is None or isinstance(node.value, str)):
+            return node.value
+        return UNKNOWN_FONT
+
+    def _add_text(self, text_node, font, node):
+        if font is None:
+            return      # The built in font contains all characters
+        if font == UNKNOWN_FONT:
+            self.dynamic.append((self.filename, node.lineno, font))
+            return
+        chars = self.font_chars.setdefault(font, set())
+        if isinstance(text_node, ast.Constant) and isinstance(text_node.value, str):
+            chars.update(text_node.value)
+            return
+        if isinstance(text_node, ast.JoinedStr):
+            # f-string. The literal parts are known, the formatted values are dynamic.
+            for value in text_node.values:
+                if isinstance(value, ast.Constant):
+                    chars.update(value.value)
+        self.dynamic.append((self.filename, node.lineno, font))
+
+def find_source_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in sorted(files):
+                    if filename.endswith('.py'):
+                        yield os.path.join(root, filename)
+        else:
+            yield path
+
+def char_ranges(chars):
+    """ Convert a set of characters to a --chars argument for create-font.py (e.g. 32,48-57)."""
+    codes = sorted(ord(char) for char in chars)
+    ranges = []
+    start = 0
+    while start < len(codes):
+        end = start
+        while end + 1 < len(codes) and codes[end + 1] == codes[end] + 1:
+            end += 1
+        ranges.append(f'{codes[start]}' if start == end else f'{codes[start]}-{codes[end]}')
+        start = end + 1
+    return ','.join(ranges)
+
+def write_packed_font(filename, default_character, characters, bitstream=False):
+    header = [ord('P'), ord('B') if bitstream else ord('F'), ord(default_character), len(characters)]
+    data = b''
+    for code, width, height, glyph in characters:
+        header += [code, width, height, len(data) % 256, len(data) >> 8]
+        data += glyph
+    with open(filename, 'wb') as f:
+        f.write(bytes(header))
+        f.write(data)
+    return len(header) + len(data)
+
+def subset_font(font_name, chars, fonts_folder, output_folder):
+    input_filename = os.path.join(fonts_folder, f'{font_name}.pf')
+    if not os.path.exists(input_filename):
+        print(f'{font_name}: {input_filename} not found, use --chars {char_ranges(chars)} when creating the font.')
+        return
+    default_character, characters, bitstream = read_packed_font(input_filename)
+    chars = set(chars)
+    chars.add(default_character)       # Used to render any character not in the font
+    subset = [character for character in characters if chr(character[0]) in chars]
+    missing = chars - set(chr(character[0]) for character in characters)
+    before = os.path.getsize(input_filename)
+    after = 4 + sum(5 + len(character[3]) for character in subset)
+    print(f'{font_name}: --chars {char_ranges(chars)}')
+    print(f'    {len(characters)} -> {len(subset)} characters, {before} -> {after} bytes ({100 - after * 100 // before}% smaller)')
+    if missing:
+        print(f'    Characters not in the font (rendered as {default_character!r}): {"".join(sorted(missing))!r}')
+    if output_folder:
+        write_packed_font(os.path.join(output_folder, f'{font_name}.pf'), default_character, subset, bitstream)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Create packed fonts containing only the characters rendered by an application.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('sources', nargs='+', help='Application source files or folders to scan.')
+    parser.add_argument('--fonts', help='Folder containing the full packed font files.', default='.')
+    parser.add_argument('--extra', help='Extra characters for a font, for text which is not a string literal (e.g. digits-30=0123456789).', action='append', default=[])
+    parser.add_argument('--output', help='Folder to write the subset packed font files to. If omitted, only the report is produced.', default=None)
+    args = parser.parse_args()
+
+    font_chars = {}
+    dynamic = []
+    for filename in find_source_files(args.sources):
+        with open(filename, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename)
+        finder = TextFinder(filename, font_chars)
+        finder.visit(tree)
+        dynamic += finder.dynamic
+
+    for extra in args.extra:
+        font_name, _, chars = extra.partition('=')
+        font_chars.setdefault(font_name, set()).update(chars)
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    for font_name in sorted(font_chars):
+        subset_font(font_name, font_chars[font_name], args.fonts, args.output)
+
+    if dynamic:
+        print('Text which is not a string literal, or in a font which is not a string literal (supply its characters with --extra):')
+        for filename, line, font_name in dynamic:
+            print(f'    {filename}:{line} ({font_name})')
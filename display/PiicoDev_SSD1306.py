@@ -29,11 +29,14 @@ _SET_DISP_CLK_DIV = 0xD5
 _SET_PRECHARGE = 0xD9
 _SET_VCOM_DESEL = 0xDB
 _SET_CHARGE_PUMP = 0x8D
+_SET_SCROLL_RIGHT = 0x26
+_SET_SCROLL_LEFT = 0x27
+_SET_SCROLL_STOP = 0x2E
+_SET_SCROLL_START = 0x2F
 WIDTH = 128
 HEIGHT = 64
 
 from PiicoDev_Unified import *
-from math import cos,sin,radians
 
 compat_str = '\nUnified PiicoDev library out of date.  Get the latest module: https://piico.dev/unified \n'
 
@@ -53,11 +56,11 @@ if _SYSNAME == 'microbit' or _SYSNAME == 'Linux':
         class FrameBuffer():
                 #Framebuffer manipulation, used by Microbit and Linux
             def _set_pos(self, col=0, page=0):
-                self.write_cmd(0xb0 | page)  # page number
                 # take upper and lower value of col * 2
                 c1, c2 = col * 2 & 0x0F, col >> 3
-                self.write_cmd(0x00 | c1)  # lower start column address
-                self.write_cmd(0x10 | c2)  # upper start column address
+                self.write_cmds((0xb0 | page,  # page number
+                                 0x00 | c1,  # lower start column address
+                                 0x10 | c2))  # upper start column address
                 
             def fill(self, c=0):
                 for i in range(0, 1024):
@@ -120,35 +123,72 @@ if _SYSNAME == 'microbit' or _SYSNAME == 'Linux':
                     x1 += 1        
          
             def hline(self, x, y, l, c):
-                self.line(x, y, x + l, y, c)
+                # l pixels long, the same as MicroPython's framebuf
+                if l > 0:
+                    self.line(x, y, x + l - 1, y, c)
                 
             def vline(self, x, y, h, c):
-                self.line(x, y, x, y + h, c)
+                if h > 0:
+                    self.line(x, y, x, y + h - 1, c)
                 
             def rect(self, x, y, w, h, c):
                 self.hline(x, y, w, c)
-                self.hline(x, y+h, w, c)
+                self.hline(x, y+h-1, w, c)
                 self.vline(x, y, h, c)
-                self.vline(x+w, y, h, c)
+                self.vline(x+w-1, y, h, c)
                           
             def fill_rect(self, x, y, w, h, c):
                 for i in range(y, y + h):
                     self.hline(x, i, w, c)
+
+            def scroll(self, xstep, ystep):
+                # Shift the buffer contents, leaving the uncovered area unchanged (same as MicroPython's framebuf)
+                # Each column is handled as a single integer with bit n holding row n.
+                pages = HEIGHT // 8
+                all_rows = (1 << HEIGHT) - 1
+                if ystep >= 0:
+                    keep = all_rows if ystep >= HEIGHT else (1 << ystep) - 1
+                else:
+                    keep = all_rows ^ (all_rows >> -ystep)
+                old = bytes(self.buffer)
+                for x in range(max(0, xstep), min(WIDTH, WIDTH + xstep)):
+                    src = 0
+                    dst = 0
+                    for page in range(pages):
+                        src |= old[page * WIDTH + x - xstep] << (page * 8)
+                        dst |= old[page * WIDTH + x] << (page * 8)
+                    src = src << ystep if ystep >= 0 else src >> -ystep
+                    val = (dst & keep) | (src & all_rows & ~keep)
+                    for page in range(pages):
+                        self.buffer[page * WIDTH + x] = (val >> (page * 8)) & 0xFF
                     
+            _font = None    # Built in 8x8 font, read once from font-pet-me-128.dat and shared by all displays
+
             def text(self, text, x, y, c=1):
-                fontFile = open("font-pet-me-128.dat", "rb")
-                font = bytearray(fontFile.read())
-                for text_index in range(0, len(text)):
-                     ind = 0
-                     for col in range(8):
-                        fontDataPixelValues = font[(ord(text[text_index])-32)*8 + col]
-                        #ind = text_index * 8 + x * 8 + y * 128 + col
-                        for i in range(0,7):
-                            if fontDataPixelValues & 1 << i != 0:
-                                x_coordinate = x + col + text_index * 8
-                                y_coordinate = y+i
-                                if x_coordinate < WIDTH and y_coordinate < HEIGHT:
-                                    self.pixel(x_coordinate, y_coordinate, c)
+                # Each character is 8 columns of the built in font, with bit n holding row n, so each column is written
+                # directly into the buffer pages it covers. Clipped and drawn the same as MicroPython's framebuf.text.
+                font = framebuf.FrameBuffer._font
+                if font is None:
+                    with open("font-pet-me-128.dat", "rb") as fontFile:
+                        font = framebuf.FrameBuffer._font = fontFile.read()
+                page, shift = y >> 3, y & 7
+                pages = HEIGHT // 8
+                upper = page * WIDTH if 0 <= page < pages else -1   # Index of the page holding the top rows of each character
+                lower = (page + 1) * WIDTH if shift and 0 <= page + 1 < pages else -1
+                for char in text:
+                    code = ord(char)
+                    if code < 32 or code > 127:
+                        code = 127
+                    index = (code - 32) * 8
+                    for col in range(max(0, -x), min(8, WIDTH - x)):
+                        bits = font[index + col]
+                        if upper >= 0:
+                            b = (bits << shift) & 0xFF
+                            self.buffer[upper + x + col] = self.buffer[upper + x + col] | b if c else self.buffer[upper + x + col] & ~b
+                        if lower >= 0:
+                            b = bits >> (8 - shift)
+                            self.buffer[lower + x + col] = self.buffer[lower + x + col] | b if c else self.buffer[lower + x + col] & ~b
+                    x += 8
     
     
 class PiicoDev_SSD1306(framebuf.FrameBuffer):
@@ -157,7 +197,8 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
         self.height = HEIGHT
         self.pages = HEIGHT // 8
         self.buffer = bytearray(self.pages * WIDTH)
-        for cmd in (
+        self._show_prefix = self._cmds_prefix((_SET_COL_ADDR, 0, WIDTH - 1, _SET_PAGE_ADDR, 0, self.pages - 1))
+        self.write_cmds((
             _SET_DISP,  # display off
             # address setting
             _SET_MEM_ADDR,
@@ -190,8 +231,7 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
             _SET_CHARGE_PUMP,
             0x14,
             _SET_DISP | 0x01,  # display on
-        ):  # on
-            self.write_cmd(cmd)
+        ))
 
     def poweroff(self):
         self.write_cmd(_SET_DISP)
@@ -200,26 +240,43 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
         self.write_cmd(_SET_DISP | 0x01)
 
     def setContrast(self, contrast):
-        self.write_cmd(_SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.write_cmds((_SET_CONTRAST, contrast))
 
     def invert(self, invert):
         self.write_cmd(_SET_NORM_INV | (invert & 1))
 
     def rotate(self, rotate):
-        self.write_cmd(_SET_COM_OUT_DIR | ((rotate & 1) << 3))
-        self.write_cmd(_SET_SEG_REMAP | (rotate & 1))
+        self.write_cmds((_SET_COM_OUT_DIR | ((rotate & 1) << 3), _SET_SEG_REMAP | (rotate & 1)))
+
+    def start_scroll(self, left, start_page=0, end_page=7, interval=7):
+        # Continuous horizontal scroll performed by the display itself. interval is the 3 bit frame interval code (7 = every 2 frames).
+        self.write_cmds((
+            _SET_SCROLL_STOP,   # must be deactivated before changing the scroll setup
+            _SET_SCROLL_LEFT if left else _SET_SCROLL_RIGHT,
+            0x00,  # dummy byte
+            start_page,
+            interval,
+            end_page,
+            0x00,  # dummy bytes
+            0xFF,
+            _SET_SCROLL_START,
+        ))
+
+    def stop_scroll(self):
+        # The display RAM must be rewritten (i.e. show()) after stopping a scroll
+        self.write_cmd(_SET_SCROLL_STOP)
 
-    def show(self):
-        x0 = 0
-        x1 = WIDTH - 1
-        self.write_cmd(_SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(_SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+    def show(self, buf=None):
+        # The window covering the whole display is set and the frame sent in a single transaction
+        self.write_prefixed_data(self._show_prefix, self.buffer if buf is None else buf) # buf allows a copy of the frame buffer to be sent instead
+        
+    def show_window(self, x0, x1, page0, page1):
+        # Send columns x0..x1 of pages page0..page1 of the buffer, for partial updates
+        width = x1 - x0 + 1
+        data = bytearray(width * (page1 - page0 + 1))
+        for i, page in enumerate(range(page0, page1 + 1)):
+            data[i * width:(i + 1) * width] = self.buffer[page * WIDTH + x0:page * WIDTH + x1 + 1]
+        self.write_prefixed_data(self._cmds_prefix((_SET_COL_ADDR, x0, x1, _SET_PAGE_ADDR, page0, page1)), data)
         
     def write_cmd(self, cmd):
         try:
@@ -229,6 +286,37 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
             print(i2c_err_str.format(self.addr))
             self.comms_err = True
             
+    def write_cmds(self, cmds):
+        # Send a sequence of commands in a single transaction. Control byte 0x00 (Co=0, D/C#=0) marks all following bytes as commands.
+        try:
+            self.i2c.writeto_mem(self.addr, 0x00, bytes(cmds))
+            self.comms_err = False
+        except:
+            print(i2c_err_str.format(self.addr))
+            self.comms_err = True
+
+    def _cmds_prefix(self, cmds):
+        # Each command preceded by control byte 0x80 (Co=1, D/C#=0), followed by control byte 0x40 (Co=0, D/C#=1) so data can follow in the same transaction
+        prefix = bytearray(len(cmds) * 2 + 1)
+        for i, cmd in enumerate(cmds):
+            prefix[i * 2] = 0x80
+            prefix[i * 2 + 1] = cmd
+        prefix[-1] = 0x40
+        return prefix
+
+    def write_prefixed_data(self, prefix, buf):
+        # Send a prefix from _cmds_prefix() and data in a single transaction. writevto (MicroPython) sends both without copying the data.
+        try:
+            writevto = getattr(getattr(self.i2c, 'i2c', None), 'writevto', None)
+            if writevto:
+                writevto(self.addr, (prefix, buf))
+            else:
+                self.i2c.writeto_mem(self.addr, prefix[0], prefix[1:] + buf)
+            self.comms_err = False
+        except:
+            print(i2c_err_str.format(self.addr))
+            self.comms_err = True
+            
     def write_data(self, buf):
         try:
             self.write_list[1] = buf
@@ -249,6 +337,7 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
                         self.pixel(i,j,c)
                    
     def arc(self,x,y,r,stAng,enAng,t=0,c=1):
+        from math import cos,sin,radians    # Only imported when needed, to speed up start up
         for i in range(r*(1-t)-1,r):
             for ta in range(stAng,enAng,1):
                 X = int(i*cos(radians(ta))+ x)
@@ -305,37 +394,37 @@ class PiicoDev_SSD1306(framebuf.FrameBuffer):
             x -= 1
 
 class PiicoDev_SSD1306_MicroPython(PiicoDev_SSD1306):
-    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C):
+    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C, clear=True):
         self.i2c = create_unified_i2c(bus=bus, freq=freq, sda=sda, scl=scl)
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b'\x40', None]  # Co=0, D/C#=1
         self.init_display()
         super().__init__(self.buffer, WIDTH, HEIGHT, framebuf.MONO_VLSB)
-        self.fill(0)
-        self.show()
+        if clear:   # The buffer starts zeroed, so only the display needs clearing
+            self.show()
         
 class PiicoDev_SSD1306_MicroBit(PiicoDev_SSD1306):
-    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C):
+    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C, clear=True):
         self.i2c = create_unified_i2c(bus=bus, freq=freq, sda=sda, scl=scl)
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b'\x40', None]  # Co=0, D/C#=1
         self.init_display()
-        self.fill(0)
-        self.show()
+        if clear:   # The buffer starts zeroed, so only the display needs clearing
+            self.show()
 
 class PiicoDev_SSD1306_Linux(PiicoDev_SSD1306):
-    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C):
+    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=0x3C, clear=True):
         self.i2c = create_unified_i2c(bus=bus, freq=freq, sda=sda, scl=scl)
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b'\x40', None]  # Co=0, D/C#=1
         self.init_display()
-        self.fill(0)
-        self.show()
+        if clear:   # The buffer starts zeroed, so only the display needs clearing
+            self.show()
                         
-def create_PiicoDev_SSD1306(address=0x3C,bus=None, freq=None, sda=None, scl=None, asw=None):
+def create_PiicoDev_SSD1306(address=0x3C,bus=None, freq=None, sda=None, scl=None, asw=None, clear=True):
     if asw == 0: _a = 0x3C
     elif asw == 1: _a = 0x3D
     else: _a = address # parse desired address from direct address input or asw switch position (0 or 1)
@@ -347,9 +436,9 @@ def create_PiicoDev_SSD1306(address=0x3C,bus=None, freq=None, sda=None, scl=None
     except:
         print(compat_str)
     if _SYSNAME == 'microbit':
-        display = PiicoDev_SSD1306_MicroBit(addr=_a, freq=freq)
+        display = PiicoDev_SSD1306_MicroBit(addr=_a, freq=freq, clear=clear)
     elif _SYSNAME == 'Linux':
-        display = PiicoDev_SSD1306_Linux(addr=_a, freq=freq)
+        display = PiicoDev_SSD1306_Linux(addr=_a, bus=bus, freq=freq, clear=clear)
     else:
-        display = PiicoDev_SSD1306_MicroPython(addr=_a, bus=bus, freq=freq, sda=sda, scl=scl)
+        display = PiicoDev_SSD1306_MicroPython(addr=_a, bus=bus, freq=freq, sda=sda, scl=scl, clear=clear)
     return display
\ No newline at end of file
@@ -0,0 +1,210 @@
+# Off-screen monochrome bitmaps, in the same MONO_VLSB format as the SSD1306 frame buffer (1 byte per 8 vertical pixels).
+# Composed elements (e.g. an icon with a label, or a gauge face) can be rendered into a bitmap once, using packed_font.text()
+# and the drawing primitives, then stamped into the display many times with blit().
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+from packed_font import TRANSPARENT, OPAQUE, INVERSE, XOR, blit_columns
+
+try:
+    import framebuf     # MicroPython's native frame buffer provides the drawing primitives
+except ImportError:     # CPython (e.g. Raspberry Pi) and micro:bit use the Python implementations below
+    framebuf = None
+
+_builtin_font = None    # Built in 8x8 font, loaded the first time text is rendered without framebuf
+
+class Bitmap:
+    def __init__(self, width, height, buffer=None):
+        """Create a monochrome bitmap, cleared to 0.
+
+        Args:
+            width (int): Width of the bitmap in pixels.
+            height (int): Height of the bitmap in pixels.
+            buffer (bytearray, optional): Existing MONO_VLSB buffer of width * ((height + 7) // 8) bytes to draw into. Defaults to None (allocate a new buffer).
+        """
+        self.width = width
+        self.height = height
+        self.buffer = buffer if buffer is not None else bytearray(width * ((height + 7) >> 3))
+        if framebuf:
+            # Replace the Python drawing primitives with the native ones, which draw into the same buffer
+            fb = framebuf.FrameBuffer(self.buffer, width, height, framebuf.MONO_VLSB)
+            self._fb = fb
+            self.fill = fb.fill
+            self.pixel = fb.pixel
+            self.hline = fb.hline
+            self.vline = fb.vline
+            self.line = fb.line
+            self.rect = fb.rect
+            self.fill_rect = fb.fill_rect
+            self.text = fb.text
+
+    def blit(self, bitmap, x, y, mode=OPAQUE, clip=None):
+        """Copy another bitmap into this bitmap. See blit().
+        """
+        blit(self, bitmap, x, y, mode, clip)
+
+    def fill(self, c=0):
+        self.buffer[:] = (b'\xff' if c else b'\x00') * len(self.buffer)
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = (y >> 3) * self.width + x
+            if c is None:
+                return (self.buffer[index] >> (y & 7)) & 1
+            if c:
+                self.buffer[index] |= 1 << (y & 7)
+            else:
+                self.buffer[index] &= ~(1 << (y & 7))
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c):
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        left = max(x, 0)
+        right = min(x + w, self.width)
+        top = max(y, 0)
+        bottom = min(y + h, self.height)
+        if left >= right or top >= bottom:
+            return
+        buffer = self.buffer
+        for page in range(top >> 3, ((bottom - 1) >> 3) + 1):
+            mask = _page_mask(page, top, bottom)
+            start = page * self.width
+            for i in range(start + left, start + right):
+                buffer[i] = buffer[i] | mask if c else buffer[i] & ~mask
+
+    def line(self, x1, y1, x2, y2, c):
+        # Bresenham's algorithm, stepping in the same order as MicroPython's framebuf so both draw the same pixels
+        dx = x2 - x1
+        sx = 1
+        if dx < 0:
+            dx = -dx
+            sx = -1
+        dy = y2 - y1
+        sy = 1
+        if dy < 0:
+            dy = -dy
+            sy = -1
+        steep = dy > dx
+        if steep:
+            x1, y1 = y1, x1
+            dx, dy = dy, dx
+            sx, sy = sy, sx
+        e = 2 * dy - dx
+        for i in range(dx):
+            if steep:
+                self.pixel(y1, x1, c)
+            else:
+                self.pixel(x1, y1, c)
+            while e >= 0:
+                y1 += sy
+                e -= 2 * dx
+            x1 += sx
+            e += 2 * dy
+        self.pixel(x2, y2, c)
+
+    def text(self, text, x, y, c=1):
+        # The built in font is stored as 8 columns per character, with bit n holding row n, so each character is blitted as columns
+        global _builtin_font
+        if _builtin_font is None:
+            with open('font-pet-me-128.dat', 'rb') as f:
+                _builtin_font = f.read()
+        if y >= self.height or y + 8 <= 0:
+            return
+        first_row = max(0, -y)
+        last_row = min(8, self.height - y)
+        for char in text:
+            if x >= self.width:
+                break
+            if x + 8 > 0:
+                code = ord(char)
+                if code < 32 or code > 127:
+                    code = 127
+                index = (code - 32) << 3
+                blit_columns(self.buffer, self.width, _builtin_font[index:index + 8], x, y, max(0, -x), min(8, self.width - x), first_row, last_row, c, TRANSPARENT)
+            x += 8
+
+def _page_mask(page, top, bottom):
+    """ Mask of the rows from top to bottom (exclusive) which are within a page."""
+    mask = 0xFF
+    if page == top >> 3:
+        mask &= (0xFF << (top & 7)) & 0xFF
+    if page == (bottom - 1) >> 3:
+        mask &= 0xFF >> (7 - ((bottom - 1) & 7))
+    return mask
+
+def blit(target, bitmap, x, y, mode=OPAQUE, clip=None):
+    """Copy a bitmap into a MONO_VLSB target, a byte (8 rows) at a time.
+
+    Args:
+        target (Bitmap): The bitmap or display (anything with buffer, width and height attributes) to copy into. Nothing is copied if its buffer is None.
+        bitmap (Bitmap): The bitmap to copy.
+        x (int): X coordinate of the left of the bitmap within the target.
+        y (int): Y coordinate of the top of the bitmap within the target.
+        mode (int, optional): OPAQUE = copy all pixels, TRANSPARENT = only set the pixels which are set in the bitmap,
+                              INVERSE = copy all pixels inverted, XOR = invert the pixels under the set pixels of the bitmap. Defaults to OPAQUE.
+        clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height) within the target. Nothing is copied outside this rectangle. Defaults to the whole target.
+    """
+    buffer = target.buffer
+    if buffer is None:
+        return
+    clip_x, clip_y, clip_width, clip_height = clip if clip else (0, 0, target.width, target.height)
+    left = max(x, clip_x, 0)
+    right = min(x + bitmap.width, clip_x + clip_width, target.width)
+    top = max(y, clip_y, 0)
+    bottom = min(y + bitmap.height, clip_y + clip_height, target.height)
+    if left >= right or top >= bottom:
+        return
+    source = bitmap.buffer
+    source_width = bitmap.width
+    source_pages = (bitmap.height + 7) >> 3
+    target_width = target.width
+    count = right - left
+    shift = y & 7       # Rows of each source page are split across two target pages, unless y is a multiple of 8
+    for page in range(top >> 3, ((bottom - 1) >> 3) + 1):
+        mask = _page_mask(page, top, bottom)
+        dst = page * target_width + left
+        source_page = page - (y >> 3)   # Source page whose rows start at this page
+        if shift == 0:
+            src = source_page * source_width + left - x
+            row = source[src:src + count]
+        else:
+            # Combine the top rows of the source page with the bottom rows of the page above it
+            row = bytearray(count)
+            if source_page < source_pages:
+                src = source_page * source_width + left - x
+                for i in range(count):
+                    row[i] = (source[src + i] << shift) & 0xFF
+            if source_page > 0:
+                src = (source_page - 1) * source_width + left - x
+                for i in range(count):
+                    row[i] |= source[src + i] >> (8 - shift)
+        if mode == OPAQUE:
+            if mask == 0xFF:
+                buffer[dst:dst + count] = row
+            else:
+                for i in range(count):
+                    buffer[dst + i] = (buffer[dst + i] & ~mask) | (row[i] & mask)
+        elif mode == INVERSE:
+            for i in range(count):
+                buffer[dst + i] = (buffer[dst + i] & ~mask) | (~row[i] & mask)
+        elif mode == XOR:
+            for i in range(count):
+                buffer[dst + i] ^= row[i] & mask
+        else:
+            for i in range(count):
+                buffer[dst + i] |= row[i] & mask
@@ -0,0 +1,112 @@
+# Class used to drive a group of SSD1306 displays (e.g. at addresses 0x3C and 0x3D, or on separate I2C buses) with the following features:
+#  - All displays share a single store of packed fonts, loaded once, while each display keeps its own font selection.
+#  - show() sends the frames for displays on different I2C buses concurrently, so the total refresh time
+#    scales with the number of buses rather than the number of displays.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+import os
+import packed_font
+
+_SYSNAME = os.uname().sysname       # 'rp2', 'microbit', 'esp32' or 'Linux', as detected by the PiicoDev drivers
+
+class Display_Group:
+    def __init__(self, displays):
+        """Create a group from a list of Enhanced_Display objects.
+
+        Args:
+            displays (list[Enhanced_Display]): The displays in the group. Displays on the same I2C bus (including the default bus,
+                                               however it was specified) are sent one after the other.
+
+        Raises:
+            ValueError: If the displays are on more than 2 buses on the Pico, which only supports a single extra thread to send them.
+        """
+        self.displays = list(displays)
+        self._buses = []        # List of displays for each bus, in the order each bus was first seen
+        bus_index = {}
+        for display in self.displays:
+            bus = _bus_number(display.bus)
+            if not bus in bus_index:
+                bus_index[bus] = len(self._buses)
+                self._buses.append([])
+            self._buses[bus_index[bus]].append(display)
+        if _SYSNAME == 'rp2' and len(self._buses) > 2:
+            raise ValueError(f'The displays are on {len(self._buses)} I2C buses, but the Pico can only send to 2 buses at once (it supports a single extra thread).')
+        self._workers = []      # (wake lock, done lock) for each bus after the first, created on the first call to show()
+
+    def __getitem__(self, index):
+        return self.displays[index]
+
+    def __len__(self):
+        return len(self.displays)
+
+    def load_fonts(self, font_name_list):
+        """Load a list of packed fonts into the font store shared by all displays in the group.
+
+        Args:
+            font_name_list (list[string]): A list of font names (without the .pf extension) to load.
+        """
+        for font_name in font_name_list:
+            packed_font.load_font(font_name)
+
+    def fill(self, c=0):
+        for display in self.displays:
+            display.fill(c)
+
+    def clear(self):
+        """Clear all displays and show the blank screens.
+        """
+        self.fill(0)
+        self.show()
+
+    def show(self):
+        """Show the frame buffer of every display in the group. Displays on different buses are sent concurrently,
+           displays sharing a bus are sent one after the other. Returns once all displays have been sent.
+        """
+        if len(self._buses) > 1 and not self._workers:
+            self._start_workers()
+        for wake, _ in self._workers:
+            wake.release()
+        self._show_bus(self._buses[0])      # The first bus is sent on the calling thread
+        for _, done in self._workers:
+            done.acquire()
+
+    def flush(self):
+        """Wait until all frames have been sent to every display (see Enhanced_Display.enable_double_buffering()).
+        """
+        for display in self.displays:
+            display.flush()
+
+    def _start_workers(self):
+        """ Start a worker thread for each bus after the first."""
+        import _thread  # Only imported when needed, to speed up start up
+        for bus_displays in self._buses[1:]:
+            wake = _thread.allocate_lock()
+            done = _thread.allocate_lock()
+            wake.acquire()
+            done.acquire()
+            self._workers.append((wake, done))
+            _thread.start_new_thread(self._bus_worker, (bus_displays, wake, done))
+
+    def _bus_worker(self, bus_displays, wake, done):
+        while True:
+            wake.acquire()
+            self._show_bus(bus_displays)
+            done.release()
+
+    def _show_bus(self, bus_displays):
+        for display in bus_displays:
+            display.show()
+
+def _bus_number(bus):
+    """ The I2C bus number a display created with the bus argument is on, resolving None to the default bus of the platform."""
+    if _SYSNAME == 'microbit':
+        return 0        # micro:bit has a single I2C bus
+    if bus is None:
+        return 1 if _SYSNAME == 'Linux' else 0     # See PiicoDev_Unified.create_unified_i2c()
+    return bus
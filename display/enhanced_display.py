@@ -2,6 +2,10 @@
 #  - Render different sized fonts using the packed_font module.
 #  - Detects if a display is present and performs NOPs if not present (i.e. code will still run without a display connected)
 #  - Take a screenshot of the display and save it to a .bmp file.
+#  - Optional double buffering, where show() returns immediately and a background worker sends the frame to the display.
+#  - Optional frame rate governor, which coalesces multiple calls to show() into a single transfer per frame interval.
+#  - Partial updates, which only send the area of the display marked as changed.
+#  - Blit off-screen bitmaps (see the bitmap module) into the frame buffer.
 #
 # Copyright (C) Mark Gladding 2023.
 #
@@ -10,18 +14,45 @@
 # https://github.com/mark-gladding/packed-font
 #
 
-from PiicoDev_SSD1306 import *
-import math
+from PiicoDev_SSD1306 import create_PiicoDev_SSD1306, WIDTH, HEIGHT
 import packed_font
-import struct
+from packed_font import TRANSPARENT, OPAQUE, INVERSE, XOR, ticks_ms, ticks_diff
+import time
 
 class Enhanced_Display:
-    def __init__(self, address=0x3C,bus=None, freq=None, sda=None, scl=None, asw=None):
-        self._display = create_PiicoDev_SSD1306(address, bus, freq, sda, scl, asw)
+    def __init__(self, address=0x3C,bus=None, freq=None, sda=None, scl=None, asw=None, clear=True):
+        """Create the display. If no display is detected, all functions perform NOPs.
+
+        Args:
+            address (int, optional): I2C address of the display. Defaults to 0x3C.
+            bus (int, optional): I2C bus number. Defaults to None (the default bus).
+            freq (int, optional): I2C frequency. Defaults to None (400kHz).
+            sda (Pin, optional): I2C data pin. Defaults to None.
+            scl (Pin, optional): I2C clock pin. Defaults to None.
+            asw (int, optional): Address switch position (0 = 0x3C, 1 = 0x3D), used instead of address. Defaults to None.
+            clear (bool, optional): True to clear the display when it's created. Pass False for a faster start when
+                                    the application draws and shows its first screen immediately. Defaults to True.
+        """
+        self._display = create_PiicoDev_SSD1306(address, bus, freq, sda, scl, asw, clear)
+        self.bus = bus
         self.width = WIDTH
         self.height = HEIGHT
         self.is_present = False
         self.selected_font = None
+        self.frames_dropped = 0         # Number of frames replaced by a newer frame before they could be sent (double buffering only)
+        self._front_buffer = None       # Frame currently being sent to the display by the worker (double buffering only)
+        self._pending_buffer = None     # Most recent frame passed to show(), waiting to be sent (double buffering only)
+        self._pending_ticks = 0         # Time of the first show() call for the pending frame (double buffering only)
+        self._frame_pending = False
+        self._transmitting = False
+        self._worker_running = False
+        self._frame_interval_ms = 0     # Minimum time between frame transfers, or 0 when the frame rate governor is disabled
+        self._show_requested = False    # A call to show() is waiting to be transmitted by tick() (frame rate governor only)
+        self._requested_ticks = 0       # Time of the first show() call for the frame waiting to be transmitted
+        self._transmitted_ticks = 0     # Time the last frame was transmitted (or queued for the double buffering worker)
+        self._hardware_scrolling = False
+        self._dirty = None              # Changed area (x0, y0, x1, y1) to send on the next call to show_dirty(), or None
+        self.reset_show_stats()
 
         if self._display.comms_err:
             print('Display not detected.')
@@ -51,6 +82,35 @@ class Enhanced_Display:
             for font_name in font_name_list:
                 packed_font.load_font(font_name)        
 
+    def load_fonts_in_background(self, font_name_list, use_thread=True):
+        """Load a list of packed fonts without blocking, so the first screen can be shown while they load.
+           Selecting a font which hasn't been loaded yet waits for it to load.
+
+        Args:
+            font_name_list (list[string]): A list of font names (without the .pf extension) to load.
+            use_thread (bool, optional): True to load the fonts on a background thread. On the Pico, this uses the single
+                                         extra thread available, so it can't be combined with double buffering. False to
+                                         return a generator which loads one font each time it is stepped. Defaults to True.
+
+        Returns:
+            generator: When use_thread is False, a generator to step from the main loop (e.g. next(loader, None)), otherwise None.
+        """
+        if not self.is_present:
+            return None
+        if use_thread:
+            packed_font.load_fonts_in_background(font_name_list)
+            return None
+        return packed_font.load_fonts_incrementally(font_name_list)
+
+    def set_font_budget(self, budget):
+        """Set the maximum memory used by loaded fonts (shared by all displays). The least recently selected fonts are unloaded to stay
+           within the budget, and reloaded the next time they are selected.
+
+        Args:
+            budget (int): Maximum bytes used by the loaded fonts (see packed_font.get_font_stats()), or 0 for no limit.
+        """
+        packed_font.set_font_budget(budget)
+
     def unload_all_fonts(self):
         """ Unload all fonts and select the built in font as the current font."""
         if self.is_present:
@@ -65,22 +125,23 @@ class Enhanced_Display:
         """    
         self.selected_font = font_name
 
-    def get_text_size(self, text):
+    def get_text_size(self, text, scale=1, rotate=0):
         """Calculate the width and height of the rendered text using the currently selected font.
 
         Args:
             text (string): The text string to measure
+            scale (int, optional): Integer scale factor the text will be rendered at. Ignored by the built in font. Defaults to 1.
+            rotate (int, optional): Rotation the text will be rendered at (0, 90 or 270). Ignored by the built in font. Defaults to 0.
 
         Returns:
             (int, int): Tuple containing the width and height of the rendered text.
         """
 
         if self.is_present:
-            packed_font.select_font(self.selected_font)
-            return packed_font.get_text_size(text)
+            return packed_font.get_text_size(text, packed_font.get_font(self.selected_font), scale, rotate)
         return 0, 0
         
-    def text(self, text, x, y, horiz_align=0, vert_align=0, max_width=WIDTH, max_height=HEIGHT, c=1):
+    def text(self, text, x, y, horiz_align=0, vert_align=0, max_width=WIDTH, max_height=HEIGHT, c=1, clip=None, mode=TRANSPARENT, scale=1, rotate=0):
         """Render a text string to the display in the currently selected font, with optional alignment.
 
         Args:
@@ -92,17 +153,58 @@ class Enhanced_Display:
             max_width (int, optional): Width of the box to align text horizontally within. Defaults to display width.
             max_height (int, optional): Height of the box to align text vertically within. Defaults to display height.
             c (int, optional): Color to render text in. Defaults to 1.
+            clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height). Nothing is drawn outside this rectangle. Defaults to the whole display.
+            mode (int, optional): TRANSPARENT = only draw the set bits of each character, OPAQUE = also fill the background of the text box with the opposite color,
+                                  INVERSE = opaque with the colors swapped, XOR = invert the pixels under the set bits. Defaults to TRANSPARENT.
+            scale (int, optional): Integer scale factor (e.g. 2 = each pixel of the font becomes a 2 x 2 block). Not supported by the built in font. Defaults to 1.
+            rotate (int, optional): Rotation in degrees clockwise. 0 = horizontal, 90 = reading top to bottom, 270 = reading bottom to top.
+                                    (x, y) is the top left of the rotated text. Not supported by the built in font. Defaults to 0.
+
+        Raises:
+            ValueError: If rotate is not 0, 90 or 270.
         """    
         if self.is_present:
-            packed_font.select_font(self.selected_font)
-            packed_font.text(self._display, text, x, y, max_width, horiz_align, max_height, vert_align, c)
+            packed_font.text(self._display, text, x, y, max_width, horiz_align, max_height, vert_align, c, packed_font.get_font(self.selected_font), clip, mode, scale, rotate)
+
+    def layout_text(self, text, max_width=WIDTH, max_height=HEIGHT, horiz_align=0, vert_align=0, line_spacing=0, wrap=True, ellipsis=False):
+        """Break text into lines which fit within a box using the currently selected font, with optional word wrap, alignment and ellipsis.
+
+        Args:
+            text (string): Text to lay out. '\\n' starts a new line.
+            max_width (int, optional): Width of the box. Defaults to display width.
+            max_height (int, optional): Height of the box. Lines which don't fit are dropped. Defaults to display height.
+            horiz_align (int, optional): 0 = Left, 1 = Center, 2 = Right. Defaults to 0.
+            vert_align (int, optional): 0 = Top, 1 = Center, 2 = Bottom. Defaults to 0.
+            line_spacing (int, optional): Number of blank pixels between lines. Defaults to 0.
+            wrap (bool, optional): True to wrap lines wider than the box. Defaults to True.
+            ellipsis (bool, optional): True to end the last visible line with '...' when text is dropped (or cut off when wrap is False). Defaults to False.
+
+        Returns:
+            list[(string, int, int, int, int)]: A (text, x, y, width, height) tuple for each line, relative to the top left of the box.
+        """
+        if self.is_present:
+            return packed_font.layout_text(text, max_width, max_height, horiz_align, vert_align, line_spacing, wrap, ellipsis, packed_font.get_font(self.selected_font))
+        return []
+
+    def render_lines(self, lines, x=0, y=0, c=1, clip=None):
+        """Render lines returned by layout_text() in the currently selected font, without measuring the text again.
+
+        Args:
+            lines (list[(string, int, int, int, int)]): Lines returned by layout_text().
+            x (int, optional): X coordinate of the left of the box the text was laid out in. Defaults to 0.
+            y (int, optional): Y coordinate of the top of the box the text was laid out in. Defaults to 0.
+            c (int, optional): Color to render text in. Defaults to 1.
+            clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height). Nothing is drawn outside this rectangle. Defaults to the whole display.
+        """
+        if self.is_present:
+            packed_font.render_lines(self._display, lines, x, y, c, packed_font.get_font(self.selected_font), clip)
 
     def clear(self):
         """Clear the display and show the blank screen.
         """        
         if self.is_present:
             self._display.fill(0)
-            self._display.show()
+            self.show()
 
     def save_screenshot(self, filename):
         """Save the current screen contents to file in .bmp format.
@@ -137,6 +239,9 @@ class Enhanced_Display:
             Code from https://stackoverflow.com/questions/8729459/how-do-i-create-a-bmp-file-with-pure-python
         """
 
+        import math     # Only imported when needed, to speed up start up
+        import struct
+
         mult4 = lambda n: int(math.ceil(n/4))*4
         mult8 = lambda n: int(math.ceil(n/8))*8
         lh = lambda n: struct.pack("<h", n)
@@ -149,6 +254,193 @@ class Enhanced_Display:
                 lh(width) + lh(h) + b"\x01\x00\x01\x00\x00\x00\x00\xff\xff\xff" +
                 b"".join([bytes(row+pad) for row in reversed(rows)]))
     
+    def enable_double_buffering(self, enable=True):
+        """Enable or disable double buffered mode.
+           When enabled, drawing takes place in a back buffer and show() copies it to a pending buffer and returns immediately.
+           A background worker thread sends the most recent pending frame to the display. If show() is called again before
+           the worker has picked up the pending frame, the stale frame is dropped (see frames_dropped).
+
+        Args:
+            enable (bool, optional): True to enable double buffering, False to wait for outstanding frames and disable it. Defaults to True.
+        """
+        if not self.is_present or enable == (self._front_buffer is not None):
+            return
+        import _thread
+        if enable:
+            self._front_buffer = bytearray(len(self._display.buffer))
+            self._pending_buffer = bytearray(len(self._display.buffer))
+            self._frame_lock = _thread.allocate_lock()
+            self._wake_worker = _thread.allocate_lock()
+            self._wake_worker.acquire()     # Released by show() each time a new frame is pending
+            self._worker_running = True
+            _thread.start_new_thread(self._transmit_worker, ())
+        else:
+            self.flush()
+            self._worker_running = False
+            self._wake_worker.release()
+            while self._transmitting:
+                time.sleep(0.001)
+            self._front_buffer = None
+            self._pending_buffer = None
+
+    def flush(self):
+        """Wait until all frames passed to show() have been sent to the display. Returns immediately if double buffering is not enabled.
+        """
+        while self._frame_pending or self._transmitting:
+            time.sleep(0.001)
+
+    async def flush_async(self):
+        """Asyncio version of flush(), which yields to other tasks while waiting for all frames to be sent to the display.
+        """
+        import asyncio
+        while self._frame_pending or self._transmitting:
+            await asyncio.sleep(0.001)
+
+    def _queue_frame(self):
+        """ Copy the back buffer to the pending buffer and wake the worker if it's waiting for a frame."""
+        with self._frame_lock:
+            if self._frame_pending:
+                self.frames_dropped += 1    # The worker hasn't picked up the previous frame yet, so replace it
+            self._pending_buffer[:] = self._display.buffer
+            self._pending_ticks = self._requested_ticks
+            wake_worker = not self._frame_pending
+            self._frame_pending = True
+        if wake_worker:
+            self._wake_worker.release()
+
+    def _transmit_worker(self):
+        """ Background worker which sends each pending frame to the display (_thread on the Pico, a thread under Linux)."""
+        while True:
+            self._wake_worker.acquire()
+            if not self._worker_running:
+                break
+            with self._frame_lock:
+                # Swap the pending and front buffers, so show() can queue the next frame while this one is sent
+                self._pending_buffer, self._front_buffer = self._front_buffer, self._pending_buffer
+                self._transmitting = True       # Set before clearing _frame_pending, so flush() never sees both cleared while a frame is still to be sent
+                self._frame_pending = False
+                requested_ticks = self._pending_ticks
+            self._display.show(self._front_buffer)
+            with self._frame_lock:
+                self._record_transmitted(requested_ticks)
+            self._transmitting = False
+
+    def set_max_fps(self, fps):
+        """Enable or disable the frame rate governor.
+           When enabled, show() only marks the frame as pending. The frame is transmitted by tick() (or run_governor())
+           at most once per frame interval, so multiple calls to show() within an interval are coalesced into a single transfer.
+
+        Args:
+            fps (int): The maximum number of frames per second to transmit, or 0 to disable the governor (show() transmits immediately).
+        """
+        if fps <= 0 and self._show_requested:
+            self._transmit_frame()      # Don't lose a frame that's waiting for the next interval
+        self._frame_interval_ms = 1000 // fps if fps > 0 else 0
+
+    def tick(self):
+        """Transmit the pending frame if the frame rate governor is enabled and the current frame interval has elapsed.
+           Call this regularly from the application's main loop.
+
+        Returns:
+            bool: True if a frame was transmitted.
+        """
+        if self._show_requested and ticks_diff(ticks_ms(), self._transmitted_ticks) >= self._frame_interval_ms:
+            self._transmit_frame()
+            return True
+        return False
+
+    async def run_governor(self):
+        """Asyncio task which transmits pending frames while the frame rate governor is enabled (see set_max_fps()).
+        """
+        import asyncio
+        while self._frame_interval_ms > 0:
+            self.tick()
+            wait_ms = self._frame_interval_ms - ticks_diff(ticks_ms(), self._transmitted_ticks)
+            await asyncio.sleep(max(wait_ms, 1) / 1000)
+
+    def get_show_stats(self):
+        """Get statistics on the frames requested by show() and transmitted to the display.
+
+        Returns:
+            dict: 'requested', 'transmitted', 'coalesced' and 'dropped' frame counts, plus the 'last', 'max' and 'average'
+                  latency in milliseconds from the first show() call for a frame until it was sent to the display.
+                  With double buffering, frames are counted once the worker has sent them, so dropped frames aren't counted as transmitted.
+        """
+        stats = self._show_stats.copy()
+        stats['dropped'] = self.frames_dropped
+        stats['average'] = stats['total_latency'] // stats['transmitted'] if stats['transmitted'] else 0
+        del stats['total_latency']
+        return stats
+
+    def reset_show_stats(self):
+        """ Reset the statistics returned by get_show_stats()."""
+        self.frames_dropped = 0
+        self._show_stats = { 'requested' : 0, 'transmitted' : 0, 'coalesced' : 0, 'last' : 0, 'max' : 0, 'total_latency' : 0 }
+
+    def _transmit_frame(self):
+        """ Send the current frame to the display (or to the double buffering worker) and update the frame statistics."""
+        if self._hardware_scrolling:
+            self.stop_hardware_scroll()     # Writing to the display RAM while scrolling corrupts it
+        if self._front_buffer is None:
+            self._display.show()
+            self._record_transmitted(self._requested_ticks)
+        else:
+            self._queue_frame()     # The worker records the frame once it has been sent (or drops it)
+        self._dirty = None      # The whole display has been sent
+        self._transmitted_ticks = ticks_ms()
+        self._show_requested = False
+
+    def _record_transmitted(self, requested_ticks):
+        """ Update the frame statistics once a frame has been sent to the display."""
+        stats = self._show_stats
+        latency = ticks_diff(ticks_ms(), requested_ticks)
+        stats['transmitted'] += 1
+        stats['last'] = latency
+        stats['max'] = max(stats['max'], latency)
+        stats['total_latency'] += latency
+
+    def mark_dirty(self, x, y, w, h):
+        """Mark an area of the display as changed, to be sent by the next call to show_dirty().
+
+        Args:
+            x (int): X coordinate of the left of the changed area.
+            y (int): Y coordinate of the top of the changed area.
+            w (int): Width of the changed area.
+            h (int): Height of the changed area.
+        """
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w) - 1
+        y1 = min(self.height, y + h) - 1
+        if x0 > x1 or y0 > y1:
+            return
+        if self._dirty:
+            dirty_x0, dirty_y0, dirty_x1, dirty_y1 = self._dirty
+            x0 = min(x0, dirty_x0)
+            y0 = min(y0, dirty_y0)
+            x1 = max(x1, dirty_x1)
+            y1 = max(y1, dirty_y1)
+        self._dirty = (x0, y0, x1, y1)
+
+    def show_dirty(self):
+        """Send only the area of the display marked as changed by mark_dirty(), rounded out to whole pages (8 pixel rows).
+           Does nothing if no area is marked as changed.
+        """
+        if self.is_present and self._dirty:
+            x0, y0, x1, y1 = self._dirty
+            self._dirty = None
+            if self._hardware_scrolling:
+                # The whole display RAM must be rewritten after stopping a hardware scroll
+                self.stop_hardware_scroll()
+                x0, y0, x1, y1 = 0, 0, self.width - 1, self.height - 1
+            self.flush()
+            self._display.show_window(x0, x1, y0 >> 3, y1 >> 3)
+
+    @property
+    def buffer(self):
+        """ The frame buffer (MONO_VLSB format, 1 byte per 8 vertical pixels) or None if the display is not present."""
+        return self._display.buffer if self.is_present else None
+
     # --------------- Frame buffer functions --------------
 
     def fill(self, c=0):
@@ -183,30 +475,81 @@ class Enhanced_Display:
         if self.is_present:
             self._display.scroll(xstep, ystep)
 
+    def blit(self, source, x, y, mode=OPAQUE, clip=None):
+        """Copy an off-screen bitmap into the frame buffer.
+
+        Args:
+            source (Bitmap): The bitmap to copy.
+            x (int): X coordinate of the left of the bitmap.
+            y (int): Y coordinate of the top of the bitmap.
+            mode (int, optional): OPAQUE = copy all pixels, TRANSPARENT = only set the pixels which are set in the bitmap,
+                                  INVERSE = copy all pixels inverted, XOR = invert the pixels under the set pixels of the bitmap. Defaults to OPAQUE.
+            clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height). Nothing is copied outside this rectangle. Defaults to the whole display.
+        """
+        from bitmap import blit     # Only imported when needed, to speed up start up
+        blit(self, source, x, y, mode, clip)
+
     # --------------- SSD1306 display functions --------------
 
     def show(self):
         if self.is_present:
-            self._display.show()
+            self._show_stats['requested'] += 1
+            if self._show_requested:
+                self._show_stats['coalesced'] += 1
+                return
+            self._requested_ticks = ticks_ms()
+            self._show_requested = True
+            if self._frame_interval_ms == 0:
+                self._transmit_frame()
+
+    def start_hardware_scroll(self, left=True, start_page=0, end_page=7, interval=7):
+        """Start a continuous horizontal scroll, performed by the display itself without any CPU or bus traffic per step.
+           The contents of the pages wrap around as they scroll. The next call to show() stops the scroll.
+
+        Args:
+            left (bool, optional): True to scroll left, False to scroll right. Defaults to True.
+            start_page (int, optional): First page (8 pixel high row) to scroll, 0-7. Defaults to 0.
+            end_page (int, optional): Last page to scroll, 0-7. Defaults to 7.
+            interval (int, optional): Time between scroll steps in frames. 0 = 5, 1 = 64, 2 = 128, 3 = 256, 4 = 3, 5 = 4, 6 = 25, 7 = 2. Defaults to 7.
+        """
+        if self.is_present:
+            self.flush()
+            self._display.start_scroll(left, start_page, end_page, interval)
+            self._hardware_scrolling = True
+
+    def stop_hardware_scroll(self):
+        """Stop a scroll started by start_hardware_scroll(). The display shows the frame buffer again after the next call to show().
+        """
+        if self.is_present and self._hardware_scrolling:
+            self.flush()
+            self._display.stop_scroll()
+            self._hardware_scrolling = False
+
+    # Display commands wait for any frame being sent by the double buffering worker, so they don't share the bus with it.
 
     def poweroff(self):
         if self.is_present:
+            self.flush()
             self._display.poweroff()
 
     def poweron(self):
         if self.is_present:
+            self.flush()
             self._display.poweron()
 
     def setContrast(self, contrast):
         if self.is_present:
+            self.flush()
             self._display.setContrast(contrast)
 
     def invert(self, invert):
         if self.is_present:
+            self.flush()
             self._display.invert(invert)
 
     def rotate(self, rotate):
         if self.is_present:
+            self.flush()
             self._display.rotate(rotate)
 
     def circ(self,x,y,r,t=1,c=1):
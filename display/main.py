@@ -14,8 +14,10 @@ if __name__ == "__main__":
 
     display = Enhanced_Display()
 
-    # Load the list of fonts to use
-    display.load_fonts(['digits-30', 'text-16', 'icons-32', 'icons-128'])
+    # Load the fonts used by the first screen, then load the rest while it's shown.
+    # A loader stepped from the main thread leaves the Pico's only extra thread free for the application.
+    display.load_fonts(['text-16', 'icons-128'])
+    loader = display.load_fonts_in_background(['digits-30', 'icons-32'], use_thread=False)
 
     # Display the Welcome screen
     display.fill(0)                         # Clear the screen
@@ -28,6 +30,8 @@ if __name__ == "__main__":
     display.save_screenshot("title.bmp")    # Take a screenshot and save to file.
 
     display.show()
+    for _ in loader:                        # Load the remaining fonts
+        pass
     time.sleep(3)
 
     # Display the Text Alignment intro screen
@@ -0,0 +1,64 @@
+# Class used to scroll a line of text (a marquee or ticker) across part of an Enhanced_Display.
+# The text is rendered once into an off-screen bitmap (the strip) and each step blits a window of the strip
+# into the frame buffer, rather than re-rendering the text.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+import packed_font
+from bitmap import Bitmap, blit, OPAQUE
+
+class Marquee:
+    def __init__(self, display, text, x, y, width, gap=16, c=1):
+        """Create a marquee which scrolls text to the left within a window of the display, using the display's selected packed font.
+
+        Args:
+            display (Enhanced_Display): The display to render the marquee on.
+            text (string): Text to scroll.
+            x (int): X coordinate of the left of the marquee window.
+            y (int): Y coordinate of the top of the marquee window.
+            width (int): Width of the marquee window.
+            gap (int, optional): Number of blank pixels between the end of the text and its start as it wraps around. Defaults to 16.
+            c (int, optional): Color to render text in. Defaults to 1.
+
+        Raises:
+            ValueError: If the display's selected font isn't a packed font.
+        """
+        font = packed_font.get_font(display.selected_font)
+        if not font:
+            raise ValueError('Marquee requires a packed font.')
+        self._display = display
+        self.x = max(0, x)
+        self.y = y
+        self.width = min(width, display.width - self.x)
+        self.offset = 0
+        text_width, self.height = packed_font.get_text_size(text, font)
+        # The text is rendered at the same offset within a page as the window, so each blit is a straight byte copy.
+        self._y_offset = y & 7
+        self._strip = Bitmap(max(text_width + gap, self.width), self._y_offset + self.height)
+        if c == 0:
+            self._strip.fill(1)
+        packed_font.text(self._strip, text, 0, self._y_offset, c=c, font=font)
+
+    def step(self, pixels=1):
+        """Scroll the text left and draw the marquee. Call show() on the display afterwards.
+
+        Args:
+            pixels (int, optional): Number of pixels to scroll. Defaults to 1.
+        """
+        self.offset = (self.offset + pixels) % self._strip.width
+        self.draw()
+
+    def draw(self):
+        """Draw the current window of the marquee into the display's frame buffer."""
+        window = (self.x, self.y, self.width, self.height)
+        strip_x = self.x - self.offset
+        strip_y = self.y - self._y_offset
+        # The window is at most two copies of the strip, as the strip is at least as wide as the window.
+        blit(self._display, self._strip, strip_x, strip_y, OPAQUE, window)
+        if strip_x + self._strip.width < self.x + self.width:
+            blit(self._display, self._strip, strip_x + self._strip.width, strip_y, OPAQUE, window)
@@ -9,8 +9,59 @@
 # MIT License (see the accompanying license file)
 #
 
-_loaded_fonts = {}
+import gc
+
+try:
+    from time import ticks_ms, ticks_us, ticks_diff
+except ImportError:     # CPython doesn't provide the MicroPython ticks functions. Other modules import them from here.
+    from time import perf_counter_ns
+
+    def ticks_ms():
+        return perf_counter_ns() // 1000000
+
+    def ticks_us():
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(ticks1, ticks2):
+        return ticks1 - ticks2
+
+_loaded_fonts = {}         # Font store shared by all displays. Fonts are not modified once loaded.
 _current_font = None
+_SELECTED_FONT = object()  # Default font argument, which renders in the currently selected font
+_font_stats = {}           # Memory and load time statistics for each loaded font
+_pending_fonts = []        # Fonts queued for incremental or background loading, which haven't been loaded yet
+
+class _NoLock:
+    """ Stands in for the font load lock when _thread isn't available (e.g. micro:bit), where fonts are only loaded on the main thread."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+try:
+    from _thread import allocate_lock
+    _load_lock = allocate_lock()
+except ImportError:
+    _load_lock = _NoLock()
+
+# Text rendering modes
+TRANSPARENT = 0            # Only draw the set bits of each character
+OPAQUE = 1                 # Also fill the background of the text box with the opposite color
+INVERSE = 2                # Opaque, with the text and background colors swapped
+XOR = 3                    # Invert the pixels under the set bits of each character
+
+_glyph_cache = {}          # Characters converted to columns, keyed by (font name, start index, rotation)
+_glyph_cache_order = []    # Glyph cache keys, oldest first
+_glyph_cache_size = 64
+_builtin_glyph = None      # Bitmap used to clip characters of the built in font (see _builtin_columns())
+
+_font_budget = 0           # Maximum bytes used by loaded fonts, or 0 for no limit (see set_font_budget())
+_font_last_used = {}       # Use count when each loaded font was last selected, to find the least recently selected font
+_font_use_count = 0
+_evicted_fonts = set()     # Fonts unloaded to stay within the font budget, which are reloaded when next selected
+_font_evictions = 0
+_font_reloads = 0
 
 def load_font(font_name):
     """Load a packed font into memory for use. Once loaded, the font must be selected for use.
@@ -18,24 +69,197 @@ def load_font(font_name):
     Args:
         font_name (string): Name of the font, without the .pf extension.
     """    
-    global _loaded_fonts
+    global _font_reloads
+    with _load_lock:    # Fonts may also be loaded by a background thread (see load_fonts_in_background())
+        if not font_name in _loaded_fonts:
+            if font_name in _evicted_fonts:
+                _evicted_fonts.remove(font_name)
+                _font_reloads += 1
+            _load_font(font_name)
+            _touch_font(font_name)
+            _enforce_font_budget(font_name)
+        if font_name in _pending_fonts:
+            _pending_fonts.remove(font_name)
+
+def load_fonts_incrementally(font_name_list):
+    """Generator which loads one font from a list each time it is stepped (e.g. by calling next(loader, None) from the main loop).
+       This allows the first screen to be shown while the remaining fonts load. Selecting a font which hasn't been loaded yet
+       loads it immediately.
+
+    Args:
+        font_name_list (list[string]): A list of font names (without the .pf extension) to load.
+
+    Yields:
+        string: The name of each font once it has been loaded.
+    """
+    for font_name in font_name_list:
+        if not font_name in _loaded_fonts and not font_name in _pending_fonts:
+            _pending_fonts.append(font_name)
+    def loader():
+        for font_name in font_name_list:
+            load_font(font_name)
+            yield font_name
+    return loader()
+
+def load_fonts_in_background(font_name_list):
+    """Load a list of fonts on a background thread (_thread on the Pico, which only supports a single extra thread).
+       Selecting a font which hasn't been loaded yet waits for it to load.
+
+    Args:
+        font_name_list (list[string]): A list of font names (without the .pf extension) to load.
+    """
+    import _thread  # Only imported when needed, to speed up start up
+    loader = load_fonts_incrementally(font_name_list)
+    _thread.start_new_thread(_run_loader, (loader,))
+
+def _run_loader(loader):
+    for _ in loader:
+        pass
+
+def _load_font(font_name):
+    has_mem_free = hasattr(gc, 'mem_free')     # MicroPython only
+    if has_mem_free:
+        gc.collect()
+        mem_free_before = gc.mem_free()
+    start_ticks = ticks_us()
+    font = _load_packed_font(font_name)
+    load_us = ticks_diff(ticks_us(), start_ticks)
+    _loaded_fonts[font_name] = font
+    if not font:
+        return
+    data_bytes = len(font['data'])
+    if has_mem_free:
+        gc.collect()
+        mem_free_after = gc.mem_free()
+        object_bytes = mem_free_before - mem_free_after - data_bytes
+    else:
+        mem_free_before = mem_free_after = None
+        object_bytes = _estimate_object_bytes(font)
+    _font_stats[font_name] = {
+        'header_bytes' : 4 + font['character_count'] * 5,
+        'data_bytes' : data_bytes,
+        'object_bytes' : object_bytes,
+        'load_us' : load_us,
+        'mem_free_before' : mem_free_before,
+        'mem_free_after' : mem_free_after
+    }
+
+def _estimate_object_bytes(font):
+    """ Estimate the memory used by the Python objects of a font (excluding the glyph data), when gc.mem_free() is not available."""
+    import sys
+    size = sys.getsizeof(font) + sys.getsizeof(font['characters'])
+    for char, char_definition in font['characters'].items():
+        size += sys.getsizeof(char) + sys.getsizeof(char_definition)
+    return size
+
+def set_font_budget(budget):
+    """Set the maximum memory used by loaded fonts. Whenever loading or selecting a font takes the total over the budget, the least recently
+       selected fonts (other than the selected font) are unloaded. An unloaded font is reloaded the next time it is selected (or got with get_font()).
+
+    Args:
+        budget (int): Maximum bytes of glyph data plus Python object overhead (see get_font_stats()) across all loaded fonts, or 0 for no limit.
+                      The most recently loaded font is always kept, even if it alone exceeds the budget.
+    """
+    global _font_budget
+    _font_budget = budget
+    with _load_lock:
+        _enforce_font_budget()
+
+def get_font_budget_stats():
+    """Get the statistics of the font budget.
+
+    Returns:
+        dict: 'budget' (see set_font_budget()), 'loaded_bytes' (memory used by the loaded fonts), 'evictions' (fonts unloaded to stay
+              within the budget) and 'reloads' (unloaded fonts which were loaded again when selected).
+    """
+    return {
+        'budget' : _font_budget,
+        'loaded_bytes' : sum(_font_bytes(font_name) for font_name in _loaded_fonts),
+        'evictions' : _font_evictions,
+        'reloads' : _font_reloads
+    }
+
+def _font_bytes(font_name):
+    stats = _font_stats.get(font_name)
+    return stats['data_bytes'] + stats['object_bytes'] if stats else 0
+
+def _touch_font(font_name):
+    global _font_use_count
+    _font_use_count += 1
+    _font_last_used[font_name] = _font_use_count
 
-    if font_name in _loaded_fonts:
+def _enforce_font_budget(keep=None):
+    """ Unload the least recently selected fonts (other than keep and the current font) until the loaded fonts fit within the font budget."""
+    global _font_evictions
+    if not _font_budget:
         return
-    _loaded_fonts[font_name] = _load_packed_font(font_name) 
+    total = sum(_font_bytes(font_name) for font_name in _loaded_fonts)
+    evicted = False
+    while total > _font_budget:
+        candidates = [font_name for font_name in _loaded_fonts if font_name != keep and font_name in _font_stats and not (_current_font and _current_font['name'] == font_name)]
+        if not candidates:
+            break
+        font_name = min(candidates, key=lambda font_name: _font_last_used.get(font_name, 0))
+        total -= _font_bytes(font_name)
+        del _loaded_fonts[font_name]
+        del _font_stats[font_name]
+        _font_last_used.pop(font_name, None)
+        for key in [key for key in _glyph_cache_order if key[0] == font_name]:
+            del _glyph_cache[key]
+            _glyph_cache_order.remove(key)
+        _evicted_fonts.add(font_name)
+        _font_evictions += 1
+        evicted = True
+    if evicted:
+        gc.collect()
+
+def get_font_stats(font_name):
+    """Get the memory and load time statistics for a loaded font.
+
+    Args:
+        font_name (string): Name of the font.
+
+    Returns:
+        dict: 'header_bytes' (header and character index in the .pf file), 'data_bytes' (glyph data), 'object_bytes' (Python object overhead),
+              'load_us' (load duration in microseconds), 'mem_free_before' and 'mem_free_after' (gc.mem_free() around the load, None under CPython).
+              None if the font is not loaded.
+    """
+    stats = _font_stats.get(font_name)
+    return stats.copy() if stats else None
+
+def memory_report():
+    """Print the memory used by each loaded font, plus the totals across all loaded fonts.
+
+    Returns:
+        dict: Totals of 'header_bytes', 'data_bytes', 'object_bytes' and 'load_us' across all loaded fonts.
+    """
+    totals = { 'header_bytes' : 0, 'data_bytes' : 0, 'object_bytes' : 0, 'load_us' : 0 }
+    print('Font              Header    Data  Object  Load ms')
+    for font_name, stats in _font_stats.items():
+        print(f'{font_name:16}{stats["header_bytes"]:8}{stats["data_bytes"]:8}{stats["object_bytes"]:8}{stats["load_us"] / 1000:9.1f}')
+        for key in totals:
+            totals[key] += stats[key]
+    print(f'{"Total":16}{totals["header_bytes"]:8}{totals["data_bytes"]:8}{totals["object_bytes"]:8}{totals["load_us"] / 1000:9.1f}')
+    if _font_budget:
+        print(f'Font budget: {_font_budget} bytes, {_font_evictions} evictions, {_font_reloads} reloads')
+    if hasattr(gc, 'mem_free'):
+        print(f'Free memory: {gc.mem_free()} bytes')
+    return totals
 
 def _load_packed_font(font_name):
     font = None
     with open(f'{font_name}.pf', 'rb') as f:
         header = f.read(4)    
-        if len(header) < 4 or header[0] != ord('P') or header[1] != ord('F'):
+        if len(header) < 4 or header[0] != ord('P') or (header[1] != ord('F') and header[1] != ord('B')):
             print(f'{font_name}.pf has an unknown file format')
             return
         font = {  'name' : font_name,
                   'default_character' : chr(header[2]),
                   'character_count': header[3],
                   'characters' : {},
-                  'data' : None           
+                  'data' : None,
+                  'bitstream' : header[1] == ord('B'),    # Rows are packed as a continuous bitstream rather than padded to whole bytes
+                  'strings' : None        # Pre-rendered strings, keyed by text (see _load_precompiled_strings())
                 }
 
         print(f'Reading font {font_name} with {font["character_count"]} characters.')
@@ -60,13 +284,49 @@ def _load_packed_font(font_name):
                 'start_index' : start_index
             }
         font['data'] = f.read()
-        return font
+    font['strings'] = _load_precompiled_strings(font_name)
+    return font
+
+def _load_precompiled_strings(font_name):
+    """ Load the strings pre-rendered in a font by precompile-strings.py from the optional <font_name>.ps file.
+        Each string is converted to a list of columns (bit n holding row n), so it is rendered as a single block."""
+    try:
+        f = open(f'{font_name}.ps', 'rb')
+    except OSError:
+        return None
+    strings = {}
+    with f:
+        header = f.read(3)
+        if len(header) < 3 or header[0] != ord('P') or header[1] != ord('S'):
+            print(f'{font_name}.ps has an unknown file format')
+            return None
+        for i in range(header[2]):
+            text = f.read(f.read(1)[0]).decode('utf-8')
+            size = f.read(3)
+            width = size[0] + size[1] * 256
+            height = size[2]
+            pages = (height + 7) >> 3
+            data = f.read(width * pages)     # MONO_VLSB, one page (8 rows) after another
+            columns = []
+            for j in range(width):
+                column = 0
+                for page in range(pages):
+                    column |= data[page * width + j] << (page << 3)
+                columns.append(column)
+            strings[text] = (width, height, columns)
+    return strings
 
 def unload_all_fonts():
     """ Unload all fonts and select the built in font as the current font."""
-    global _loaded_fonts,  _current_font
+    global _loaded_fonts,  _current_font, _font_stats, _glyph_cache, _glyph_cache_order
     _loaded_fonts = {}
     _current_font = None
+    _font_stats = {}
+    _glyph_cache = {}
+    _glyph_cache_order = []
+    _pending_fonts.clear()
+    _font_last_used.clear()
+    _evicted_fonts.clear()
 
 def select_font(font_name):
     """Select the font to use for subsequent calls to get_text_size() and text()
@@ -81,40 +341,80 @@ def select_font(font_name):
         return
 
     if _current_font and _current_font['name'] == font_name:
+        _touch_font(font_name)
         return
     
     if not font_name in _loaded_fonts:
-        print(f'Cannot select unknown font {font_name}.')
-        return
+        if not font_name in _pending_fonts and not font_name in _evicted_fonts:
+            print(f'Cannot select unknown font {font_name}.')
+            return
+        load_font(font_name)    # Wait for a font which is still being loaded, or reload a font unloaded by the font budget
     _current_font = _loaded_fonts[font_name]
+    _touch_font(font_name)
+    with _load_lock:
+        _enforce_font_budget(font_name)     # The previously selected font can now be unloaded
     
 
-def get_text_size(text):
+def get_font(font_name):
+    """Get a loaded font from the shared font store, without changing the currently selected font.
+       This allows several displays to each use their own font, passed via the font argument of get_text_size() and text().
+
+    Args:
+        font_name (string): Name of the font to get or None to get the built in font.
+
+    Returns:
+        dict: The loaded font, or None for the built in font (or if the font is not loaded).
+    """
+    if font_name == None:
+        return None
+    try:
+        font = _loaded_fonts[font_name]
+    except KeyError:
+        if font_name in _pending_fonts or font_name in _evicted_fonts:
+            load_font(font_name)    # Wait for a font which is still being loaded, or reload a font unloaded by the font budget
+            return _loaded_fonts[font_name]
+        print(f'Cannot select unknown font {font_name}.')
+        return None
+    _touch_font(font_name)
+    return font
+
+def get_text_size(text, font=_SELECTED_FONT, scale=1, rotate=0):
     """Calculate the width and height of the rendered text using the currently selected font.
 
     Args:
         text (string): The text string to measure
+        font (dict, optional): Font returned by get_font() to use instead of the currently selected font.
+        scale (int, optional): Integer scale factor the text will be rendered at. Ignored by the built in font. Defaults to 1.
+        rotate (int, optional): Rotation the text will be rendered at (0, 90 or 270). Ignored by the built in font. Defaults to 0.
 
     Returns:
         (int, int): Tuple containing the width and height of the rendered text.
     """
-    if not _current_font:
+    if font is _SELECTED_FONT:
+        font = _current_font
+    if not font:
         return len(text) * 8, 8     # Built in font
     
-    characters = _current_font['characters']
-    default_character = _current_font['default_character']
-    width = 0
-    height = 0
-    for char in text:
-        try:
-            char_definition = characters[char]
-        except KeyError:
-            char_definition = characters[default_character]
-        width += char_definition['char_width']
-        height = max(height, char_definition['char_height'])
-    return width, height
+    strings = font['strings']
+    if strings and text in strings:
+        width, height = strings[text][0], strings[text][1]     # Measured when the string was precompiled
+    else:
+        characters = font['characters']
+        default_character = font['default_character']
+        width = 0
+        height = 0
+        for char in text:
+            try:
+                char_definition = characters[char]
+            except KeyError:
+                char_definition = characters[default_character]
+            width += char_definition['char_width']
+            height = max(height, char_definition['char_height'])
+    if rotate:
+        return height * scale, width * scale
+    return width * scale, height * scale
 
-def text(display, text, x, y, max_width=0, horiz_align=0, max_height=0, vert_align=0, c=1):
+def text(display, text, x, y, max_width=0, horiz_align=0, max_height=0, vert_align=0, c=1, font=_SELECTED_FONT, clip=None, mode=TRANSPARENT, scale=1, rotate=0):
     """Render a text string to the display in the currently selected font, with optional alignment.
 
     Args:
@@ -127,40 +427,446 @@ def text(display, text, x, y, max_width=0, horiz_align=0, max_height=0, vert_ali
         max_height (int, optional): Height of the box to align text vertically within. Defaults to 0.
         vert_align (int, optional): 0 = Top, 1 = Center, 2 = Bottom. Defaults to 0.
         c (int, optional): Color to render text in. Defaults to 1.
+        font (dict, optional): Font returned by get_font() to use instead of the currently selected font.
+        clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height). Nothing is drawn outside this rectangle. Defaults to the whole display.
+        mode (int, optional): TRANSPARENT = only draw the set bits of each character, OPAQUE = also fill the background of the text box with the opposite color,
+                              INVERSE = opaque with the colors swapped, XOR = invert the pixels under the set bits. Defaults to TRANSPARENT.
+                              XOR is not supported by the built in font.
+        scale (int, optional): Integer scale factor (e.g. 2 = each pixel of the font becomes a 2 x 2 block). Not supported by the built in font. Defaults to 1.
+        rotate (int, optional): Rotation in degrees clockwise. 0 = horizontal, 90 = reading top to bottom, 270 = reading bottom to top.
+                                (x, y) is the top left of the rotated text. Not supported by the built in font. Defaults to 0.
+
+    Raises:
+        ValueError: If rotate is not 0, 90 or 270.
     """    
+    if rotate not in (0, 90, 270):
+        raise ValueError(f'Unsupported rotation {rotate}, use 0, 90 or 270.')
+    if font is _SELECTED_FONT:
+        font = _current_font
+    c = 1 if c else 0
+    if mode == INVERSE:
+        mode = OPAQUE
+        c = 1 - c
+    if not font:
+        scale = 1
+        rotate = 0
     
-    if (max_width > 0 and horiz_align > 0) or (max_height > 0 and vert_align > 0):
-        total_text_width, text_height = get_text_size(text)
+    text_height = 0
+    if (max_width > 0 and horiz_align > 0) or (max_height > 0 and vert_align > 0) or mode == OPAQUE or rotate:
+        total_text_width, text_height = get_text_size(text, font, scale)
+        box_width, box_height = (text_height, total_text_width) if rotate else (total_text_width, text_height)
         if horiz_align == 1:     # Center
-            x += int((max_width - total_text_width) / 2)
+            x += int((max_width - box_width) / 2)
         elif horiz_align == 2:   # Right
-            x += max_width - total_text_width
+            x += max_width - box_width
         if vert_align == 1:      # Center
-            y += int((max_height - text_height) / 2)
+            y += int((max_height - box_height) / 2)
         elif vert_align == 2:    # Bottom
-            y += max_height - text_height
+            y += max_height - box_height
 
-    if not _current_font:   # Built in font
-        display.text(text, x, y, c)
+    clip_x, clip_y, clip_width, clip_height = clip if clip else (0, 0, display.width, display.height)
+    clip_right = min(clip_x + clip_width, display.width)
+    clip_bottom = min(clip_y + clip_height, display.height)
+    clip_x = max(clip_x, 0)
+    clip_y = max(clip_y, 0)
+
+    if not font:   # Built in font
+        if y >= clip_bottom or y + 8 <= clip_y:
+            return
+        first = max(0, (clip_x - x) // 8)                   # Characters at least partly within the clip rectangle
+        last = min(len(text), (clip_right - x + 7) // 8)
+        if first >= last:
+            return
+        if mode == OPAQUE:
+            box_x = max(x + first * 8, clip_x)
+            box_y = max(y, clip_y)
+            display.fill_rect(box_x, box_y, min(x + last * 8, clip_right) - box_x, min(y + 8, clip_bottom) - box_y, 1 - c)
+        first_row = max(0, clip_y - y)
+        last_row = min(8, clip_bottom - y)
+        # Characters entirely within the clip rectangle are drawn by the display, the others are clipped a column at a time
+        whole_first, whole_last = first, first
+        if first_row == 0 and last_row == 8:
+            whole_first = max(first, (clip_x - x + 7) // 8)
+            whole_last = max(whole_first, min(last, (clip_right - x) // 8))
+            if whole_first < whole_last:
+                display.text(text[whole_first:whole_last], x + whole_first * 8, y, c)
+        buffer = getattr(display, 'buffer', None)
+        for i in list(range(first, whole_first)) + list(range(whole_last, last)):
+            char_x = x + i * 8
+            columns = _builtin_columns(text[i])
+            first_column = max(0, clip_x - char_x)
+            last_column = min(8, clip_right - char_x)
+            if buffer is None:
+                _pixel_columns(display, columns, char_x, y, first_column, last_column, first_row, last_row, c, TRANSPARENT)
+            else:
+                blit_columns(buffer, display.width, columns, char_x, y, first_column, last_column, first_row, last_row, c, TRANSPARENT)
         return
-    
-    characters = _current_font['characters']
-    default_character = _current_font['default_character']
-    data = _current_font['data']
+
+    buffer = getattr(display, 'buffer', None)     # Render directly into a MONO_VLSB buffer when available
+    strings = font['strings']
+    if strings and scale == 1 and not rotate and text in strings:
+        # Pre-rendered by precompile-strings.py, so the whole string is rendered as a single block of columns
+        width, height, columns = strings[text]
+        first_column = max(0, clip_x - x)
+        last_column = min(width, clip_right - x)
+        first_row = max(0, clip_y - y)
+        last_row = min(height, clip_bottom - y)
+        if first_column < last_column and first_row < last_row:
+            if buffer is None:
+                _pixel_columns(display, columns, x, y, first_column, last_column, first_row, last_row, c, mode)
+            else:
+                blit_columns(buffer, display.width, columns, x, y, first_column, last_column, first_row, last_row, c, mode)
+        return
+
+    characters = font['characters']
+    default_character = font['default_character']
+    advance = 0         # Distance along the text to the current character
     for char in text:
         try:
             char_definition = characters[char]
         except KeyError:
             char_definition = characters[default_character]
-        start_index = char_definition['start_index']
-        width = char_definition['char_width']
-        height = char_definition['char_height']
-        width_in_bytes = int((width + 7) / 8)
+        char_width = char_definition['char_width'] * scale
+        char_height = char_definition['char_height'] * scale
+        cell_height = text_height if mode == OPAQUE else char_height
+        # Position (glyph_x, glyph_y) and size of the character as rendered
+        if rotate == 0:
+            glyph_x = x + advance
+            glyph_y = y
+            if glyph_x >= clip_right:
+                break
+            columns_count, rows_count = char_width, cell_height
+        else:
+            if rotate == 90:
+                # The top of each character is on the right
+                glyph_x = x + text_height - cell_height
+                glyph_y = y + advance
+                if glyph_y >= clip_bottom:
+                    break
+            else:
+                # The top of each character is on the left and the text starts at the bottom
+                glyph_x = x
+                glyph_y = y + total_text_width - advance - char_width
+                if glyph_y + char_width <= clip_y:
+                    break
+            columns_count, rows_count = cell_height, char_width
+        advance += char_width
+        # Only render the rows and columns of the character within the clip rectangle
+        first_column = max(0, clip_x - glyph_x)
+        last_column = min(columns_count, clip_right - glyph_x)
+        first_row = max(0, clip_y - glyph_y)
+        last_row = min(rows_count, clip_bottom - glyph_y)
+        if first_column < last_column and first_row < last_row:
+            columns = _glyph_columns(font, char_definition, rotate)
+            if scale > 1:
+                columns = _scale_columns(columns, scale)
+            if rotate and cell_height > char_height:
+                # Opaque mode: pad the character to the height of the text
+                padding = [0] * (cell_height - char_height)
+                columns = padding + columns if rotate == 90 else columns + padding
+            if buffer is None:
+                _pixel_columns(display, columns, glyph_x, glyph_y, first_column, last_column, first_row, last_row, c, mode)
+            else:
+                blit_columns(buffer, display.width, columns, glyph_x, glyph_y, first_column, last_column, first_row, last_row, c, mode)
+
+def _builtin_columns(char):
+    """ Render a character of the built in font into an 8 x 8 bitmap, whose buffer holds its 8 columns (bit n holding row n)."""
+    global _builtin_glyph
+    if _builtin_glyph is None:
+        from bitmap import Bitmap   # Only imported when needed, to speed up start up
+        _builtin_glyph = Bitmap(8, 8)
+    _builtin_glyph.fill(0)
+    _builtin_glyph.text(char, 0, 0, 1)
+    return _builtin_glyph.buffer
+
+def set_glyph_cache_size(size):
+    """Set the maximum number of characters held in the glyph cache. Characters are converted (and rotated) into columns
+       the first time they are rendered and cached, so rendering them again costs no more than copying the columns.
+
+    Args:
+        size (int): Maximum number of cached characters, or 0 to disable the cache. Defaults to 64.
+    """
+    global _glyph_cache_size
+    _glyph_cache_size = size
+    while len(_glyph_cache_order) > size:
+        del _glyph_cache[_glyph_cache_order.pop(0)]
+
+def _glyph_columns(font, char_definition, rotate):
+    """ Get a character (rotated by 0, 90 or 270 degrees) as a list of columns, with bit n of each column holding row n.
+        The most recently converted characters are held in a glyph cache of bounded size, the oldest being dropped first."""
+    key = (font['name'], char_definition['start_index'], rotate)
+    columns = _glyph_cache.get(key)
+    if columns is None:
+        columns = _convert_glyph(font['data'], char_definition, rotate, font['bitstream'])
+        if _glyph_cache_size > 0:
+            if len(_glyph_cache_order) >= _glyph_cache_size:
+                del _glyph_cache[_glyph_cache_order.pop(0)]
+            _glyph_cache[key] = columns
+            _glyph_cache_order.append(key)
+    return columns
+
+def _convert_glyph(data, char_definition, rotate, bitstream=False):
+    """ Convert a character's rows of packed bytes (or its bitstream) into a list of columns, rotated by 0, 90 or 270 degrees."""
+    width = char_definition['char_width']
+    height = char_definition['char_height']
+    row_index = char_definition['start_index']
+    rows = []   # Rows with bit (width - 1 - n) holding column n
+    if bitstream:
+        # The whole character is read as one int, then each row is extracted with a shift which steps down by the width
+        size = (width * height + 7) >> 3
+        bits = int.from_bytes(data[row_index:row_index + size], 'big') >> ((size << 3) - width * height)
+        mask = (1 << width) - 1
+        shift = width * height
+        for i in range(height):
+            shift -= width
+            rows.append((bits >> shift) & mask)
+    else:
+        width_in_bytes = (width + 7) >> 3
+        padding_bits = (width_in_bytes << 3) - width
         for i in range(height):
+            rows.append(int.from_bytes(data[row_index:row_index + width_in_bytes], 'big') >> padding_bits)
+            row_index += width_in_bytes
+    if rotate == 270:
+        return rows     # Row n becomes column n, with column 0 at the bottom
+    if rotate == 90:
+        # Row n becomes column (height - 1 - n), with column 0 at the top, so the bits of each row are reversed
+        columns = []
+        for row in reversed(rows):
+            column = 0
             for j in range(width):
-                byte_index = int(j / 8)
-                bit_index = j - byte_index * 8
-                val = data[start_index + i * width_in_bytes + byte_index ]
-                if (val >> (7-bit_index)) & 1:
-                    display.pixel(x + j, y + i, c)
-        x += width
+                column = (column << 1) | (row & 1)
+                row >>= 1
+            columns.append(column)
+        return columns
+    columns = [0] * width
+    for i in range(height):
+        row = rows[i]
+        if row:
+            bit = 1 << i
+            for j in range(width):
+                if (row >> (width - 1 - j)) & 1:
+                    columns[j] |= bit
+    return columns
+
+def _scale_columns(columns, scale):
+    """ Scale a character's columns, expanding each bit into a scale x scale block."""
+    block = (1 << scale) - 1
+    scaled = []
+    for column in columns:
+        scaled_column = 0
+        shift = 0
+        while column:
+            if column & 1:
+                scaled_column |= block << shift
+            column >>= 1
+            shift += scale
+        scaled += [scaled_column] * scale
+    return scaled
+
+def blit_columns(buffer, stride, columns, x, y, first_column, last_column, first_row, last_row, c=1, mode=TRANSPARENT):
+    """Write part of a bitmap stored as columns (e.g. a character of the built in font) into a MONO_VLSB buffer, one byte at a time.
+       The part written must be within the buffer, so clip it by choosing the first and last rows and columns.
+
+    Args:
+        buffer (bytearray): The MONO_VLSB buffer (1 byte per 8 vertical pixels) to write into.
+        stride (int): Width of the buffer in pixels.
+        columns (list[int]): The columns of the bitmap, left to right, with bit n holding row n.
+        x (int): X coordinate of column 0 within the buffer.
+        y (int): Y coordinate of row 0 within the buffer.
+        first_column (int): First column to write.
+        last_column (int): Column after the last column to write.
+        first_row (int): First row to write.
+        last_row (int): Row after the last row to write.
+        c (int, optional): Color to write the set bits in. Defaults to 1.
+        mode (int, optional): TRANSPARENT, OPAQUE or XOR (see text()). Defaults to TRANSPARENT.
+    """
+    row_mask = ((1 << last_row) - 1) ^ ((1 << first_row) - 1)
+    page = (y + first_row) >> 3
+    shift = y - (page << 3)     # Offset of row 0 from the top of the first page, negative when row 0 is above it
+    pages = ((y + last_row - 1) >> 3) - page + 1
+    mask = row_mask << shift if shift >= 0 else row_mask >> -shift
+    index = page * stride + x
+    for j in range(first_column, last_column):
+        bits = columns[j] & row_mask
+        bits = bits << shift if shift >= 0 else bits >> -shift
+        if mode == OPAQUE and not c:
+            bits ^= mask
+        i = index + j
+        for k in range(0, pages << 3, 8):
+            b = (bits >> k) & 0xFF
+            if mode == TRANSPARENT:
+                if b:
+                    if c:
+                        buffer[i] |= b
+                    else:
+                        buffer[i] &= ~b
+            elif mode == OPAQUE:
+                m = (mask >> k) & 0xFF
+                buffer[i] = (buffer[i] & ~m) | b
+            elif b:     # XOR
+                buffer[i] ^= b
+            i += stride
+
+def _pixel_columns(display, columns, x, y, first_column, last_column, first_row, last_row, c, mode):
+    """ Draw rows first_row to last_row - 1 of columns first_column to last_column - 1 at (x, y) one pixel at a time, for displays without a buffer."""
+    for j in range(first_column, last_column):
+        column = columns[j]
+        for i in range(first_row, last_row):
+            bit = (column >> i) & 1
+            if mode == OPAQUE:
+                display.pixel(x + j, y + i, c if bit else 1 - c)
+            elif bit:
+                display.pixel(x + j, y + i, 1 - display.pixel(x + j, y + i) if mode == XOR else c)
+
+def layout_text(text, max_width, max_height=0, horiz_align=0, vert_align=0, line_spacing=0, wrap=True, ellipsis=False, font=_SELECTED_FONT):
+    """Break text into lines which fit within a box, in a single pass over the character widths.
+       Lines are broken at '\\n' characters and, when wrap is True, at the last space that fits (or mid word if a word doesn't fit).
+       The returned lines can be rendered by render_lines() without measuring the text again.
+
+    Args:
+        text (string): Text to lay out.
+        max_width (int): Width of the box.
+        max_height (int, optional): Height of the box. Lines which don't fit are dropped. Defaults to 0 (no limit).
+        horiz_align (int, optional): 0 = Left, 1 = Center, 2 = Right. Defaults to 0.
+        vert_align (int, optional): 0 = Top, 1 = Center, 2 = Bottom. Only used when max_height is set. Defaults to 0.
+        line_spacing (int, optional): Number of blank pixels between lines. Defaults to 0.
+        wrap (bool, optional): True to wrap lines wider than the box. Defaults to True.
+        ellipsis (bool, optional): True to end the last visible line with '...' when text is dropped (or cut off when wrap is False). Defaults to False.
+        font (dict, optional): Font returned by get_font() to use instead of the currently selected font.
+
+    Returns:
+        list[(string, int, int, int, int)]: A (text, x, y, width, height) tuple for each line, with x and y relative to the top left of the box.
+    """
+    if font is _SELECTED_FONT:
+        font = _current_font
+    if font:
+        characters = font['characters']
+        default_definition = characters[font['default_character']]
+        line_height = max(char_definition['char_height'] for char_definition in characters.values())
+    else:
+        line_height = 8     # Built in font
+
+    def char_width(char):
+        if not font:
+            return 8
+        return characters.get(char, default_definition)['char_width']
+
+    # Each line is recorded as (start, end, width) while scanning the text.
+    lines = []
+    truncated = []          # Indices of lines cut off at the box width (wrap is False)
+
+    def add_line(start, end, width):
+        # Trailing spaces aren't visible, so they're not part of the line or its width
+        while end > start and text[end - 1] == ' ':
+            end -= 1
+            width -= char_width(' ')
+        lines.append((start, end, width))
+
+    line_start = 0
+    line_width = 0
+    break_start = -1        # Index of the first space of the last run of spaces on the current line
+    break_end = -1          # Index after the last run of spaces
+    break_width = 0         # Width of the current line before the last run of spaces
+    after_break_width = 0   # Width of the current line up to the end of the last run of spaces
+    i = 0
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char == '\n':
+            add_line(line_start, i, line_width)
+            line_start = i + 1
+            line_width = 0
+            break_start = -1
+            i += 1
+            continue
+        advance = char_width(char)
+        if line_width + advance > max_width and i > line_start:
+            if not wrap:
+                # Cut the line off here and skip to the start of the next line
+                truncated.append(len(lines))
+                add_line(line_start, i, line_width)
+                end = text.find('\n', i)
+                if end < 0:
+                    line_start = length
+                    break
+                line_start = i = end + 1
+                line_width = 0
+                continue
+            if char == ' ':
+                # Break at this run of spaces, which is dropped along with the spaces after it
+                add_line(line_start, i, line_width)
+                while i < length and text[i] == ' ':
+                    i += 1
+                line_start = i
+                line_width = 0
+                break_start = -1
+                continue
+            if break_start > line_start:
+                # Break at the last run of spaces, which is dropped
+                add_line(line_start, break_start, break_width)
+                line_start = break_end
+                line_width -= after_break_width
+                break_start = -1
+            if line_width + advance > max_width and i > line_start:
+                # The word doesn't fit on a line by itself, so break mid word
+                add_line(line_start, i, line_width)
+                line_start = i
+                line_width = 0
+        if char == ' ':
+            if break_start < 0 or break_end != i:
+                break_start = i
+                break_width = line_width
+            break_end = i + 1
+            after_break_width = line_width + advance
+        line_width += advance
+        i += 1
+    if line_start < length or not lines or text[-1] == '\n':
+        add_line(line_start, length, line_width)
+
+    line_count = len(lines)
+    if max_height > 0:
+        line_count = min(line_count, max(1, (max_height + line_spacing) // (line_height + line_spacing)))
+    ellipsis_line = line_count - 1 if line_count < len(lines) else -1
+
+    block_height = line_count * line_height + (line_count - 1) * line_spacing
+    y = 0
+    if vert_align == 1:      # Center
+        y = int((max_height - block_height) / 2)
+    elif vert_align == 2:    # Bottom
+        y = max_height - block_height
+
+    result = []
+    for index in range(line_count):
+        start, end, width = lines[index]
+        line = text[start:end]
+        if ellipsis and (index == ellipsis_line or index in truncated):
+            # Remove characters from the end of the line until the ellipsis fits
+            ellipsis_width = char_width('.') * 3
+            while line and width + ellipsis_width > max_width:
+                width -= char_width(line[-1])
+                line = line[:-1]
+            line += '...'
+            width += ellipsis_width
+        x = 0
+        if horiz_align == 1:     # Center
+            x = int((max_width - width) / 2)
+        elif horiz_align == 2:   # Right
+            x = max_width - width
+        result.append((line, x, y, width, line_height))
+        y += line_height + line_spacing
+    return result
+
+def render_lines(display, lines, x, y, c=1, font=_SELECTED_FONT, clip=None):
+    """Render lines returned by layout_text(), without measuring the text again.
+
+    Args:
+        display (PiicoDev_SSD): The display to render the text on
+        lines (list[(string, int, int, int, int)]): Lines returned by layout_text().
+        x (int): X coordinate of the left of the box the text was laid out in.
+        y (int): Y coordinate of the top of the box the text was laid out in.
+        c (int, optional): Color to render text in. Defaults to 1.
+        font (dict, optional): Font returned by get_font() to use instead of the currently selected font. Must be the font the text was laid out in.
+        clip ((int, int, int, int), optional): Clip rectangle (x, y, width, height). Nothing is drawn outside this rectangle. Defaults to the whole display.
+    """
+    for line, line_x, line_y, _, _ in lines:
+        text(display, line, x + line_x, y + line_y, c=c, font=font, clip=clip)
@@ -0,0 +1,451 @@
+# Script which checks that the optimised render paths produce exactly the same pixels as the simple pixel by pixel
+# implementations they replace, and reports the speedup of each path.
+#
+# Each case renders into two in-memory frame buffers holding the same random content: one through the reference
+# implementation and one through the optimised path. The buffers are then compared byte for byte.
+# The corpus covers every character of every packed font in this folder at many x/y offsets, including positions
+# which aren't aligned to a page (8 rows) and positions partially off the display or outside a clip rectangle.
+#
+# Run under CPython from this folder (no display is needed): python render-check.py
+# The precompiled string checks run ../create/precompile-strings.py, and are skipped if it isn't found.
+# The script exits with status 1 if any path doesn't match its reference.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+try:
+    import smbus2
+except ImportError:     # Only the drawing functions of the driver are used, so no I2C bus is needed
+    sys.modules['smbus2'] = types.ModuleType('smbus2')
+    sys.modules['smbus2'].SMBus = sys.modules['smbus2'].i2c_msg = None
+
+import packed_font
+import PiicoDev_SSD1306
+from PiicoDev_SSD1306 import PiicoDev_SSD1306 as SSD1306, WIDTH, HEIGHT
+from bitmap import Bitmap, blit, TRANSPARENT, OPAQUE, INVERSE, XOR
+
+class MemoryFrameBuffer:
+    """ MONO_VLSB frame buffer which clips pixels the same as MicroPython's framebuf."""
+    def __init__(self, content):
+        self.width = WIDTH
+        self.height = HEIGHT
+        self.buffer = bytearray(content)
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = (y >> 3) * self.width + x
+            if c is None:
+                return (self.buffer[index] >> (y & 7)) & 1
+            if c:
+                self.buffer[index] |= 1 << (y & 7)
+            else:
+                self.buffer[index] &= ~(1 << (y & 7))
+        return 0
+
+class PixelOnlyFrameBuffer:
+    """ Display without a buffer attribute, which packed_font renders into one pixel at a time."""
+    def __init__(self, target):
+        self.width = target.width
+        self.height = target.height
+        self.pixel = target.pixel
+
+class DriverFrameBuffer(MemoryFrameBuffer):
+    """ In-memory frame buffer with the built in font rendering of the SSD1306 driver."""
+    if PiicoDev_SSD1306._SYSNAME in ('Linux', 'microbit'):
+        text = SSD1306.text     # Python version of framebuf.text, used on Linux and micro:bit
+
+# --------------- Reference implementations --------------
+
+def reference_text(display, font, text, x, y, c):
+    # Renders each set bit of each character with pixel(), as packed_font.text did originally
+    characters = font['characters']
+    data = font['data']
+    for char in text:
+        char_definition = characters.get(char, characters[font['default_character']])
+        start_index = char_definition['start_index']
+        width = char_definition['char_width']
+        height = char_definition['char_height']
+        width_in_bytes = int((width + 7) / 8)
+        for i in range(height):
+            for j in range(width):
+                byte_index = int(j / 8)
+                bit_index = j - byte_index * 8
+                val = data[start_index + i * width_in_bytes + byte_index]
+                if (val >> (7 - bit_index)) & 1:
+                    display.pixel(x + j, y + i, c)
+        x += width
+
+def reference_styled_text(display, font, text, x, y, c, mode, scale, rotate):
+    # Works out which pixels of the unrotated text box are set, then maps each pixel of the box to the display
+    characters = font['characters']
+    data = font['data']
+    glyphs = [characters.get(char, characters[font['default_character']]) for char in text]
+    text_width = sum(char_definition['char_width'] for char_definition in glyphs) * scale
+    text_height = max(char_definition['char_height'] for char_definition in glyphs) * scale
+    set_pixels = set()
+    advance = 0
+    for char_definition in glyphs:
+        width = char_definition['char_width']
+        width_in_bytes = (width + 7) >> 3
+        for i in range(char_definition['char_height']):
+            for j in range(width):
+                if (data[char_definition['start_index'] + i * width_in_bytes + (j >> 3)] >> (7 - (j & 7))) & 1:
+                    for dy in range(scale):
+                        for dx in range(scale):
+                            set_pixels.add((advance + j * scale + dx, i * scale + dy))
+        advance += width * scale
+    c = 1 if c else 0
+    if mode == INVERSE:
+        mode = OPAQUE
+        c = 1 - c
+    for u in range(text_width):
+        for v in range(text_height):
+            if rotate == 90:        # Clockwise, so the top of the text is on the right
+                px, py = x + text_height - 1 - v, y + u
+            elif rotate == 270:     # Anticlockwise, so the top of the text is on the left
+                px, py = x + v, y + text_width - 1 - u
+            else:
+                px, py = x + u, y + v
+            if (u, v) in set_pixels:
+                display.pixel(px, py, 1 - display.pixel(px, py) if mode == XOR else c)
+            elif mode == OPAQUE:
+                display.pixel(px, py, 1 - c)
+
+def reference_builtin_text(display, font_data, text, x, y, c):
+    # MicroPython's framebuf.text: 8 rows of 8 columns per character, characters outside 32..127 rendered as 127
+    for char in text:
+        code = ord(char)
+        if code < 32 or code > 127:
+            code = 127
+        for col in range(8):
+            bits = font_data[(code - 32) * 8 + col]
+            for row in range(8):
+                if (bits >> row) & 1:
+                    display.pixel(x + col, y + row, c)
+        x += 8
+
+def reference_layout(font, text, max_width):
+    # Greedy word wrap over the words and runs of spaces of each paragraph, measuring each candidate line from scratch
+    def width(line):
+        return sum(font['characters'].get(char, font['characters'][font['default_character']])['char_width'] for char in line)
+    lines = []
+    paragraphs = text.split('\n')
+    for index, paragraph in enumerate(paragraphs):
+        line = ''
+        pending = True      # False after breaking at spaces at the end of the paragraph, so there's no line left to add
+        for token in re.findall(' +|[^ ]+', paragraph):
+            pending = True
+            if token[0] == ' ':
+                for char in token:
+                    if line and width(line + char) > max_width:
+                        # A run of spaces which doesn't fit ends the line, and is dropped
+                        lines.append(line.rstrip(' '))
+                        line = ''
+                        pending = False
+                        break
+                    line += char
+                continue
+            if line.rstrip(' ') and width(line + token) > max_width:
+                # Move the word to the next line
+                lines.append(line.rstrip(' '))
+                line = ''
+            for char in token:
+                if line and width(line + char) > max_width:
+                    # The word doesn't fit on a line by itself
+                    lines.append(line.rstrip(' '))
+                    line = ''
+                line += char
+        if pending or index < len(paragraphs) - 1:
+            lines.append(line.rstrip(' '))
+    return [(line, width(line)) for line in lines]
+
+def clipped(before, after, clip):
+    """ The result of rendering into a clip rectangle: after inside the clip rectangle, before outside it."""
+    clip_x, clip_y, clip_width, clip_height = clip
+    result = MemoryFrameBuffer(before.buffer)
+    for x in range(max(0, clip_x), min(WIDTH, clip_x + clip_width)):
+        for y in range(max(0, clip_y), min(HEIGHT, clip_y + clip_height)):
+            result.pixel(x, y, after.pixel(x, y))
+    return result
+
+def to_bitstream(font):
+    """ Copy of a font with its characters packed as bitstreams (see pack-font.py --bitstream)."""
+    characters = {}
+    data = bytearray()
+    for char, char_definition in font['characters'].items():
+        width = char_definition['char_width']
+        height = char_definition['char_height']
+        width_in_bytes = (width + 7) >> 3
+        bits = 0
+        for i in range(height):
+            row_index = char_definition['start_index'] + i * width_in_bytes
+            bits = (bits << width) | (int.from_bytes(font['data'][row_index:row_index + width_in_bytes], 'big') >> ((width_in_bytes << 3) - width))
+        size = (width * height + 7) >> 3
+        characters[char] = { 'char_width' : width, 'char_height' : height, 'start_index' : len(data) }
+        data += (bits << ((size << 3) - width * height)).to_bytes(size, 'big')
+    bitstream_font = dict(font)
+    bitstream_font.update({ 'name' : f'{font["name"]} (bitstream)', 'characters' : characters, 'data' : bytes(data), 'bitstream' : True })
+    return bitstream_font
+
+# --------------- Checks --------------
+
+class Check:
+    def __init__(self, name):
+        self.name = name
+        self.cases = 0
+        self.mismatches = []
+        self.reference_seconds = 0
+        self.optimised_seconds = 0
+
+    def run(self, description, reference, optimised, content, expected=None):
+        """ Render a case through the reference and optimised functions (each given a frame buffer) and compare the results.
+            expected(before, after) optionally adjusts the reference result (e.g. to apply a clip rectangle)."""
+        reference_display = MemoryFrameBuffer(content)
+        start = time.perf_counter()
+        reference(reference_display)
+        self.reference_seconds += time.perf_counter() - start
+        if expected:
+            reference_display = expected(MemoryFrameBuffer(content), reference_display)
+        optimised_display = DriverFrameBuffer(content)
+        start = time.perf_counter()
+        optimised(optimised_display)
+        self.optimised_seconds += time.perf_counter() - start
+        self.cases += 1
+        if optimised_display.buffer != reference_display.buffer:
+            self.mismatches.append(description)
+
+    def expect(self, description, passed):
+        """ Record a case which isn't rendered (e.g. the state of the font store after selecting a font)."""
+        self.cases += 1
+        if not passed:
+            self.mismatches.append(description)
+
+    def report(self):
+        speedup = self.reference_seconds / self.optimised_seconds if self.optimised_seconds else 0
+        print(f'{self.name:34}{self.cases:8}{len(self.mismatches):12}{self.reference_seconds * 1000:12.1f}{self.optimised_seconds * 1000:12.1f}{speedup:9.1f}x')
+        for description in self.mismatches[:5]:
+            print(f'    Mismatch: {description}')
+        return not self.mismatches
+
+def offsets(size, limit):
+    """ Positions from partially off one edge of the display to partially off the other, including unaligned ones."""
+    return sorted(set([-size + 1, -size // 2, -3, 0, 1, 3, 7, 8, 13, limit // 2 - 1, limit - size - 1, limit - size, limit - size + 5, limit - 3, limit - 1]))
+
+def check_packed_fonts(font_names, content, quick):
+    checks = [Check(name) for name in ('packed_font.text (buffer)', 'packed_font.text (pixel)', 'packed_font.text (bitstream)', 'packed_font.text (clip)',
+                                       'packed_font.text (precompiled)', 'Bitmap blit')]
+    buffer_check, pixel_check, bitstream_check, clip_check, precompiled_check, blit_check = checks
+    for font_name in font_names:
+        packed_font.load_font(font_name)
+        font = packed_font.get_font(font_name)
+        bitstream_font = to_bitstream(font)
+        for char, char_definition in font['characters'].items():
+            width = char_definition['char_width']
+            height = char_definition['char_height']
+            for x in offsets(width, WIDTH)[::4 if quick else 1]:
+                for y in offsets(height, HEIGHT)[::4 if quick else 1]:
+                    for c in (1, 0):
+                        description = f'{font_name} {char!r} at ({x}, {y}) c={c}'
+                        reference = lambda display: reference_text(display, font, char, x, y, c)
+                        buffer_check.run(description, reference, lambda display: packed_font.text(display, char, x, y, c=c, font=font), content)
+                        pixel_check.run(description, reference, lambda display: packed_font.text(PixelOnlyFrameBuffer(display), char, x, y, c=c, font=font), content)
+                        bitstream_check.run(description, reference, lambda display: packed_font.text(display, char, x, y, c=c, font=bitstream_font), content)
+                        if c:
+                            # Characters are rendered into a bitmap once, then stamped with blit()
+                            stamp = Bitmap(width, height)
+                            packed_font.text(stamp, char, 0, 0, font=font)
+                            blit_check.run(description, reference, lambda display: blit(display, stamp, x, y, TRANSPARENT), content)
+        # Strings rendered into random clip rectangles, and the same strings precompiled by precompile-strings.py
+        random.seed(font_name)
+        characters = list(font['characters'])
+        texts = [''.join(random.choice(characters) for j in range(random.randint(1, 8))) for i in range(50 if quick else 200)]
+        with tempfile.TemporaryDirectory() as folder:
+            precompiled_font = precompile(font_name, texts, folder)
+        for text in texts:
+            x = random.randint(-20, WIDTH)
+            y = random.randint(-20, HEIGHT)
+            clip = (random.randint(-10, WIDTH), random.randint(-10, HEIGHT), random.randint(0, WIDTH), random.randint(0, HEIGHT))
+            clip_check.run(f'{font_name} {text!r} at ({x}, {y}) clip={clip}', lambda display: reference_text(display, font, text, x, y, 1),
+                           lambda display: packed_font.text(display, text, x, y, font=font, clip=clip), content, lambda before, after: clipped(before, after, clip))
+            if precompiled_font:
+                mode = random.choice((TRANSPARENT, OPAQUE, INVERSE, XOR))
+                precompiled_check.run(f'{font_name} {text!r} at ({x}, {y}) mode={mode}', lambda display: reference_styled_text(display, font, text, x, y, 1, mode, 1, 0),
+                                      lambda display: packed_font.text(display, text, x, y, font=precompiled_font, mode=mode), content)
+    return checks
+
+def precompile(font_name, texts, folder):
+    """ Precompile strings with create/precompile-strings.py, then load the font along with its .ps file from folder.
+        Returns the font, or None if the script isn't found."""
+    script = os.path.join('..', 'create', 'precompile-strings.py')
+    if not os.path.exists(script):
+        print(f'{script} not found, skipping the precompiled string checks.')
+        return None
+    list_filename = os.path.join(folder, 'strings.json')
+    with open(list_filename, 'w', encoding='utf-8') as f:
+        json.dump({ font_name : texts }, f)
+    subprocess.run([sys.executable, script, '--list', list_filename, '--fonts', '.', '--output', folder], check=True, stdout=subprocess.DEVNULL)
+    shutil.copy(f'{font_name}.pf', folder)
+    precompiled_name = os.path.join(folder, font_name)
+    packed_font.load_font(precompiled_name)
+    return packed_font.get_font(precompiled_name)
+
+def check_styles(font_names, content, quick):
+    checks = [Check('packed_font.text (styles)'), Check('packed_font.text (styles, pixel)')]
+    for font_name in font_names:
+        font = packed_font.get_font(font_name)
+        characters = list(font['characters'])
+        large = max(char_definition['char_height'] for char_definition in font['characters'].values()) > 32
+        random.seed(font_name)
+        for i in range(40 if quick else 150):
+            text = ''.join(random.choice(characters) for j in range(random.randint(1, 4)))
+            mode = random.choice((TRANSPARENT, OPAQUE, INVERSE, XOR))
+            scale = random.choice((1, 2) if large else (1, 2, 3))
+            rotate = random.choice((0, 90, 270))
+            c = random.randint(0, 1)
+            x = random.randint(-30, WIDTH)
+            y = random.randint(-30, HEIGHT)
+            clip = random.choice((None, (random.randint(-10, WIDTH), random.randint(-10, HEIGHT), random.randint(0, WIDTH), random.randint(0, HEIGHT))))
+            description = f'{font_name} {text!r} at ({x}, {y}) c={c} mode={mode} scale={scale} rotate={rotate} clip={clip}'
+            reference = lambda display: reference_styled_text(display, font, text, x, y, c, mode, scale, rotate)
+            expected = (lambda before, after: clipped(before, after, clip)) if clip else None
+            checks[0].run(description, reference, lambda display: packed_font.text(display, text, x, y, c=c, font=font, clip=clip, mode=mode, scale=scale, rotate=rotate), content, expected)
+            checks[1].run(description, reference, lambda display: packed_font.text(PixelOnlyFrameBuffer(display), text, x, y, c=c, font=font, clip=clip, mode=mode, scale=scale, rotate=rotate), content, expected)
+    return checks
+
+def check_layout(font_names, content, quick):
+    check = Check('layout_text + render_lines')
+    for font_name in font_names:
+        font = packed_font.get_font(font_name)
+        line_height = max(char_definition['char_height'] for char_definition in font['characters'].values())
+        random.seed(font_name)
+        words = [''.join(random.choice(list(font['characters'])) for j in range(random.randint(1, 6))) for i in range(20)]
+        texts = ['aa  bb  cc   dd', 'word   ']
+        for i in range(50 if quick else 200):
+            # Words separated by runs of spaces, with occasional new lines
+            texts.append(''.join(random.choice(words) + random.choice([' ', ' ', '  ', '   ', '\n', ' \n']) for j in range(random.randint(1, 8)))[:random.choice([None, -1])])
+        for text in texts:
+            max_width = random.randint(10, WIDTH)
+            horiz_align = random.randint(0, 2)
+            x = random.randint(-10, 40)
+            y = random.randint(-10, 20)
+
+            def reference(display):
+                for index, (line, line_width) in enumerate(reference_layout(font, text, max_width)):
+                    line_x = (0, int((max_width - line_width) / 2), max_width - line_width)[horiz_align]
+                    reference_text(display, font, line, x + line_x, y + index * line_height, 1)
+
+            check.run(f'{font_name} {text!r} width={max_width} align={horiz_align}', reference,
+                      lambda display: packed_font.render_lines(display, packed_font.layout_text(text, max_width, horiz_align=horiz_align, font=font), x, y, font=font), content)
+    return [check]
+
+def check_rejected_rotations(font_names):
+    """ Rotations other than 0, 90 and 270 must raise ValueError without drawing anything."""
+    check = Check('Rejected rotations')
+    for font_name in font_names[:1] + [None]:
+        font = packed_font.get_font(font_name)
+        for rotate in (180, 45, -90, 360):
+            display = MemoryFrameBuffer(bytes(WIDTH * HEIGHT // 8))
+            try:
+                packed_font.text(display, 'A1', 10, 10, font=font, rotate=rotate)
+                rejected = False
+            except ValueError:
+                rejected = True
+            except Exception:   # Any other error means the rotation wasn't validated
+                rejected = False
+            check.expect(f'{font_name} rotate={rotate} was not rejected', rejected and not any(display.buffer))
+    return [check]
+
+def check_font_budget(font_names):
+    """ Switch between the fonts under a budget smaller than any font, so only the selected font should stay loaded."""
+    check = Check('Font budget')
+    if len(font_names) < 2:
+        return []
+    packed_font.unload_all_fonts()
+    for font_name in font_names:
+        packed_font.load_font(font_name)
+    packed_font.select_font(font_names[0])
+    budget = 1000
+    packed_font.set_font_budget(budget)
+    random.seed(4)
+    for i in range(20):
+        font_name = random.choice(font_names)
+        packed_font.select_font(font_name)
+        stats = packed_font.get_font_stats(font_name)
+        loaded_bytes = packed_font.get_font_budget_stats()['loaded_bytes']
+        check.expect(f'select_font({font_name!r}) left {loaded_bytes} bytes loaded', loaded_bytes <= max(budget, stats['data_bytes'] + stats['object_bytes']))
+    packed_font.set_font_budget(0)
+    return [check]
+
+def check_builtin_font(content):
+    if not os.path.exists('font-pet-me-128.dat'):
+        print('font-pet-me-128.dat not found, skipping the built in font checks.')
+        return []
+    with open('font-pet-me-128.dat', 'rb') as f:
+        font_data = f.read()
+    checks = [Check('Built in text (Bitmap)')]
+    if hasattr(DriverFrameBuffer, 'text'):
+        checks.append(Check('Built in text (Linux framebuf)'))
+    random.seed(1)
+    for i in range(300):
+        text = ''.join(chr(random.randint(20, 140)) for j in range(random.randint(1, 17)))
+        x = random.randint(-20, WIDTH)
+        y = random.randint(-10, HEIGHT)
+        c = random.randint(0, 1)
+        description = f'{text!r} at ({x}, {y}) c={c}'
+        reference = lambda display: reference_builtin_text(display, font_data, text, x, y, c)
+        checks[0].run(description, reference, lambda display: Bitmap(WIDTH, HEIGHT, display.buffer).text(text, x, y, c), content)
+        if len(checks) > 1:
+            checks[1].run(description, reference, lambda display: display.text(text, x, y, c), content)
+    # Clip rectangles whose edges fall within characters, in the transparent and opaque modes
+    clip_check = Check('Built in text (clip)')
+    for i in range(300):
+        text = ''.join(chr(random.randint(32, 127)) for j in range(random.randint(1, 17)))
+        x = random.randint(-20, WIDTH)
+        y = random.randint(-10, HEIGHT)
+        c = random.randint(0, 1)
+        mode = random.choice((TRANSPARENT, OPAQUE))
+        clip = (random.randint(-10, WIDTH), random.randint(-10, HEIGHT), random.randint(0, WIDTH), random.randint(0, 20))
+
+        def reference(display):
+            if mode == OPAQUE:
+                for px in range(x, x + len(text) * 8):
+                    for py in range(y, y + 8):
+                        display.pixel(px, py, 1 - c)
+            reference_builtin_text(display, font_data, text, x, y, c)
+
+        clip_check.run(f'{text!r} at ({x}, {y}) c={c} mode={mode} clip={clip}', reference,
+                       lambda display: packed_font.text(Bitmap(WIDTH, HEIGHT, display.buffer), text, x, y, c=c, font=None, clip=clip, mode=mode), content,
+                       lambda before, after: clipped(before, after, clip))
+    return checks + [clip_check]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check the optimised render paths produce exactly the same pixels as the reference implementations.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--quick', help='Check a subset of the positions.', action='store_true')
+    parser.add_argument('fonts', nargs='*', help='Packed fonts to check (without the .pf extension). Defaults to all packed fonts in this folder.')
+    args = parser.parse_args()
+
+    font_names = args.fonts or sorted(filename[:-3] for filename in os.listdir('.') if filename.endswith('.pf'))
+    random.seed(0)
+    content = bytes(random.randrange(256) for i in range(WIDTH * HEIGHT // 8))     # Rendered over, to check which pixels each path leaves unchanged
+    checks = check_packed_fonts(font_names, content, args.quick) + check_styles(font_names, content, args.quick) + check_layout(font_names, content, args.quick) + check_builtin_font(content) + check_rejected_rotations(font_names) + check_font_budget(font_names)
+    print(f'{"Path":34}{"Cases":>8}{"Mismatches":>12}{"Ref ms":>12}{"Opt ms":>12}{"Speedup":>10}')
+    passed = True
+    for check in checks:
+        passed = check.report() and passed
+    print('All paths match their reference.' if passed else 'Some paths do not match their reference.')
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,153 @@
+# Optional instrumentation which records the call count and latency histogram of each render operation of an
+# Enhanced_Display and of packed_font, per screen, to find which screens miss their frame deadline.
+#
+# enable() wraps the instrumented functions with timing wrappers and disable() restores the originals,
+# so there is no cost at all while instrumentation is disabled.
+# Latencies are recorded in microseconds into log2 histograms (bucket n holds latencies from 2^(n-1) to 2^n - 1 us),
+# held in arrays which are allocated when a screen is first selected, so recording a call allocates no memory.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+from array import array
+import packed_font
+from packed_font import ticks_us, ticks_diff
+
+DISPLAY_OPERATIONS = ('text', 'get_text_size', 'layout_text', 'render_lines', 'fill', 'show', 'show_dirty', 'flush', 'save_screenshot',
+                      'pixel', 'line', 'hline', 'vline', 'rect', 'fill_rect', 'scroll', 'blit', 'circ', 'arc', 'load_pbm', 'updateGraph2D')
+PACKED_FONT_OPERATIONS = ('text', 'get_text_size', 'layout_text', 'render_lines')
+_OPERATIONS = DISPLAY_OPERATIONS + tuple(f'packed_font.{name}' for name in PACKED_FONT_OPERATIONS)
+_BUCKETS = 24               # Up to 2^23 us (about 8 seconds). Longer calls are recorded in the last bucket.
+
+_histograms = {}            # Screen name -> array of _BUCKETS counts per operation
+_totals = {}                # Screen name -> array of (total us, max us) per operation
+_histogram = None           # Histogram and totals of the current screen
+_total = None
+_screen = None
+_installed = []             # (object, attribute name, original) of each wrapped function
+
+def enable(display=None, screen='default'):
+    """Start recording the latency of each render operation of a display and of packed_font.
+
+    Args:
+        display (Enhanced_Display, optional): The display to instrument, or None to only instrument packed_font. Defaults to None.
+        screen (string, optional): Name of the screen to record calls against (see set_screen()). Defaults to 'default'.
+    """
+    set_screen(screen)
+    if display:
+        for index, name in enumerate(DISPLAY_OPERATIONS):
+            # Wrap the bound method as an instance attribute, which hides the class method until disable() removes it
+            if hasattr(display, name) and not any(installed[0] is display and installed[1] == name for installed in _installed):
+                _install(display, name, None, _wrap(getattr(display, name), index))
+    if not any(installed[0] is packed_font for installed in _installed):
+        for index, name in enumerate(PACKED_FONT_OPERATIONS):
+            original = getattr(packed_font, name)
+            _install(packed_font, name, original, _wrap(original, len(DISPLAY_OPERATIONS) + index))
+
+def disable():
+    """Stop recording and restore the original functions. The statistics recorded so far are kept."""
+    while _installed:
+        target, name, original = _installed.pop()
+        if original is None:
+            delattr(target, name)
+        else:
+            setattr(target, name, original)
+
+def set_screen(screen):
+    """Record subsequent calls against a screen, so the statistics of each screen can be compared.
+
+    Args:
+        screen (string): Name of the screen (e.g. 'menu' or 'clock').
+    """
+    global _screen, _histogram, _total
+    if not screen in _histograms:
+        _histograms[screen] = array('L', [0] * (len(_OPERATIONS) * _BUCKETS))
+        _totals[screen] = array('Q', [0] * (len(_OPERATIONS) * 2))
+    _screen = screen
+    _histogram = _histograms[screen]
+    _total = _totals[screen]
+
+def reset():
+    """Discard the statistics of all screens."""
+    for histogram in _histograms.values():
+        for i in range(len(histogram)):
+            histogram[i] = 0
+    for total in _totals.values():
+        for i in range(len(total)):
+            total[i] = 0
+
+def get_stats(screen=None):
+    """Get the statistics of each operation which has been called.
+
+    Args:
+        screen (string, optional): Name of the screen, or None for all screens. Defaults to None.
+
+    Returns:
+        dict: Screen name -> operation name -> dict of 'count', 'total_us', 'max_us' and the 'p50_us', 'p90_us' and 'p99_us' percentiles.
+              Percentiles are the upper bound of the histogram bucket they fall in (capped at the maximum), so are accurate to within a factor of 2.
+    """
+    stats = {}
+    for screen_name in ([screen] if screen else _histograms):
+        histogram = _histograms[screen_name]
+        total = _totals[screen_name]
+        screen_stats = {}
+        for index, name in enumerate(_OPERATIONS):
+            buckets = histogram[index * _BUCKETS:(index + 1) * _BUCKETS]
+            count = sum(buckets)
+            if count:
+                screen_stats[name] = {
+                    'count' : count,
+                    'total_us' : total[index * 2],
+                    'max_us' : total[index * 2 + 1],
+                    'p50_us' : min(_percentile(buckets, count, 50), total[index * 2 + 1]),
+                    'p90_us' : min(_percentile(buckets, count, 90), total[index * 2 + 1]),
+                    'p99_us' : min(_percentile(buckets, count, 99), total[index * 2 + 1])
+                }
+        stats[screen_name] = screen_stats
+    return stats
+
+def print_report(screen=None):
+    """Print the statistics of each operation which has been called, per screen.
+
+    Args:
+        screen (string, optional): Name of the screen, or None for all screens. Defaults to None.
+    """
+    for screen_name, screen_stats in get_stats(screen).items():
+        print(f'Screen {screen_name}')
+        print('Operation                   Count    Total ms   p50 us   p90 us   p99 us   Max us')
+        for name, stats in screen_stats.items():
+            print(f'{name:26}{stats["count"]:8}{stats["total_us"] / 1000:12.1f}{stats["p50_us"]:9}{stats["p90_us"]:9}{stats["p99_us"]:9}{stats["max_us"]:9}')
+
+def _percentile(buckets, count, percent):
+    threshold = (count * percent + 99) // 100
+    cumulative = 0
+    for bucket, bucket_count in enumerate(buckets):
+        cumulative += bucket_count
+        if cumulative >= threshold:
+            return (1 << bucket) - 1
+    return (1 << (_BUCKETS - 1)) - 1
+
+def _install(target, name, original, wrapper):
+    setattr(target, name, wrapper)
+    _installed.append((target, name, original))
+
+def _wrap(function, index):
+    def timed(*args, **kwargs):
+        start = ticks_us()
+        result = function(*args, **kwargs)
+        _record(index, ticks_diff(ticks_us(), start))
+        return result
+    return timed
+
+def _record(index, us):
+    bucket = 0
+    while us >> bucket and bucket < _BUCKETS - 1:
+        bucket += 1
+    _histogram[index * _BUCKETS + bucket] += 1
+    _total[index * 2] += us
+    if us > _total[index * 2 + 1]:
+        _total[index * 2 + 1] = us
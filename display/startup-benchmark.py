@@ -0,0 +1,84 @@
+# Script to measure how long it takes to import the Enhanced_Display class, create the display,
+# load fonts and show the first screen, with and without the fast start options.
+#
+# On the Pico, copy this script to the Pico alongside the other files in this folder and run it with Thonny.
+# Reset the Pico (Ctrl+D in Thonny) before each run, as modules which are already imported are not reloaded.
+# Under CPython (e.g. on a Raspberry Pi with the display connected), run: python startup-benchmark.py
+# To run it without a display connected, run: python startup-benchmark.py --mock-bus
+# This replaces the I2C bus with a fake one, where each transfer takes as long as it would at 400 kHz.
+#
+# The memory used by each loaded font and the time taken to load it are printed at the end.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+import sys
+from packed_font import ticks_us, ticks_diff
+
+I2C_FREQUENCY = 400000      # Fast mode, as set up by PiicoDev
+I2C_BITS_PER_BYTE = 9       # 8 data bits plus the acknowledge bit
+
+def mock_bus():
+    """ Replace the smbus2 module used by the PiicoDev driver under Linux with a fake I2C bus, so the benchmark runs without a display connected.
+        Each transfer takes as long as sending its bytes (plus the address byte) at 400 kHz would.
+    """
+    import types
+    import time
+
+    class Message:
+        def __init__(self, length):
+            self.length = length
+            self.buf = [b'\0'] * length
+
+    def transfer(*messages):
+        end = time.perf_counter() + sum(message.length + 1 for message in messages) * I2C_BITS_PER_BYTE / I2C_FREQUENCY
+        while time.perf_counter() < end:    # Sleep isn't precise enough for transfers this short
+            pass
+
+    smbus2 = types.ModuleType('smbus2')
+    smbus2.i2c_msg = types.SimpleNamespace(write=lambda address, data: Message(len(data)), read=lambda address, length: Message(length))
+    smbus2.SMBus = lambda bus: types.SimpleNamespace(i2c_rdwr=transfer)
+    sys.modules['smbus2'] = smbus2
+
+def measure(label, function):
+    start = ticks_us()
+    result = function()
+    print(f'{label:40}{ticks_diff(ticks_us(), start) / 1000:10.1f} ms')
+    return result
+
+def import_enhanced_display():
+    import enhanced_display
+    return enhanced_display
+
+def first_screen(display):
+    display.fill(0)
+    display.select_font('text-16')
+    display.text('Welcome', 0, 0, 1, 1)
+    display.show()
+
+if __name__ == "__main__":
+
+    if '--mock-bus' in sys.argv:
+        mock_bus()
+
+    # packed_font was imported for its ticks functions, so remove it for its import to be included in the time measured
+    del sys.modules['packed_font']
+    enhanced_display = measure('Import enhanced_display', import_enhanced_display)
+
+    display = measure('Create display (clear=True)', lambda: enhanced_display.Enhanced_Display())
+    display = measure('Create display (clear=False)', lambda: enhanced_display.Enhanced_Display(clear=False))
+
+    measure('Load text-16', lambda: display.load_fonts(['text-16']))
+    measure('Show first screen', lambda: first_screen(display))
+
+    # Each step of the incremental loader is a pause in the application's main loop
+    loader = display.load_fonts_in_background(['digits-30', 'icons-32', 'icons-128'], use_thread=False)
+    while measure('Incremental font load step', lambda: next(loader, None)):
+        pass
+
+    print()
+    enhanced_display.packed_font.memory_report()
@@ -0,0 +1,342 @@
+# Retained mode widgets for an Enhanced_Display.
+# Each widget remembers its font, text and the area it last rendered, and only erases and redraws itself
+# when its content changes. The changed area is marked on the display, so show_dirty() only sends what changed.
+#
+# Copyright (C) Mark Gladding 2023.
+#
+# MIT License (see the accompanying license file)
+#
+# https://github.com/mark-gladding/packed-font
+#
+
+from packed_font import TRANSPARENT, XOR, ticks_ms, ticks_diff
+from bitmap import Bitmap, blit
+
+def _union(rect1, rect2):
+    """ Return the smallest (x, y, w, h) rectangle containing both rectangles, either of which may be None."""
+    if not rect1:
+        return rect2
+    if not rect2:
+        return rect1
+    x = min(rect1[0], rect2[0])
+    y = min(rect1[1], rect2[1])
+    return (x, y, max(rect1[0] + rect1[2], rect2[0] + rect2[2]) - x, max(rect1[1] + rect1[3], rect2[1] + rect2[3]) - y)
+
+class Label:
+    def __init__(self, display, x, y, text='', font_name=None, max_width=0, horiz_align=0, c=1):
+        """Create a text label. The label is drawn by the first call to draw().
+
+        Args:
+            display (Enhanced_Display): The display to render the label on.
+            x (int): X coordinate of the label.
+            y (int): Y coordinate of the label.
+            text (string, optional): Initial text of the label. Defaults to ''.
+            font_name (string, optional): Name of the packed font to render the label in, or None for the built in font. Defaults to None.
+            max_width (int, optional): Width of the box to align the text horizontally within. Defaults to 0.
+            horiz_align (int, optional): 0 = Left, 1 = Center, 2 = Right. Defaults to 0.
+            c (int, optional): Color to render text in. The label is erased with the opposite color. Defaults to 1.
+        """
+        self._display = display
+        self.x = x
+        self.y = y
+        self.text = str(text)
+        self.font_name = font_name
+        self.max_width = max_width
+        self.horiz_align = horiz_align
+        self.c = c
+        self.rect = None        # Area (x, y, w, h) the label was last rendered in
+        self._changed = True
+
+    def set_text(self, text):
+        """Change the text of the label. The label is only redrawn by the next call to draw() if the text has changed.
+
+        Args:
+            text (string): The new text. Other values (e.g. numbers) are converted to a string.
+        """
+        text = str(text)
+        if text != self.text:
+            self.text = text
+            self._changed = True
+
+    def invalidate(self):
+        """Force the label to be redrawn by the next call to draw() (e.g. after the display has been cleared)."""
+        self.rect = None
+        self._changed = True
+
+    def draw(self):
+        """Erase and redraw the label if its content has changed.
+
+        Returns:
+            (int, int, int, int): The changed area (x, y, w, h) of the display, or None if nothing changed.
+        """
+        if not self._changed:
+            return None
+        self._changed = False
+        display = self._display
+        previous_font = display.selected_font
+        display.select_font(self.font_name)
+        if self.rect:
+            display.fill_rect(self.rect[0], self.rect[1], self.rect[2], self.rect[3], 1 - self.c)
+        width, height = display.get_text_size(self.text)
+        x = self.x
+        if self.max_width > 0:
+            if self.horiz_align == 1:     # Center
+                x += int((self.max_width - width) / 2)
+            elif self.horiz_align == 2:   # Right
+                x += self.max_width - width
+        display.text(self.text, x, self.y, c=self.c)
+        display.select_font(previous_font)
+        changed = _union(self.rect, (x, self.y, width, height))
+        self.rect = (x, self.y, width, height)
+        display.mark_dirty(changed[0], changed[1], changed[2], changed[3])
+        return changed
+
+class Icon(Label):
+    def __init__(self, display, x, y, font_name, glyph, c=1):
+        """Create an icon from a character of an icon font (e.g. icons-32). The icon is drawn by the first call to draw().
+
+        Args:
+            display (Enhanced_Display): The display to render the icon on.
+            x (int): X coordinate of the icon.
+            y (int): Y coordinate of the icon.
+            font_name (string): Name of the packed icon font.
+            glyph (string): The character containing the icon.
+            c (int, optional): Color to render the icon in. Defaults to 1.
+        """
+        super().__init__(display, x, y, glyph, font_name, c=c)
+
+    def set_icon(self, glyph):
+        """Change the icon. The icon is only redrawn by the next call to draw() if it has changed.
+
+        Args:
+            glyph (string): The character containing the new icon.
+        """
+        self.set_text(glyph)
+
+class NumericReadout:
+    def __init__(self, display, x, y, font_name, charset='0123456789.-', max_width=0, horiz_align=0, c=1):
+        """Create a readout for numbers (e.g. a clock or sensor reading) which only redraws the characters that change.
+           When every digit has the same width (a fixed advance font, such as digits-30), digits are positioned using that advance
+           and other characters (e.g. '.' and '-') are cells of their own width, so changing one digit redraws just that digit.
+           The readout is drawn by the first call to draw().
+
+        Args:
+            display (Enhanced_Display): The display to render the readout on.
+            x (int): X coordinate of the readout.
+            y (int): Y coordinate of the readout.
+            font_name (string): Name of the packed font to render the readout in.
+            charset (string, optional): All characters the readout displays. Defaults to '0123456789.-'.
+            max_width (int, optional): Width of the box to align the text horizontally within. Defaults to 0.
+            horiz_align (int, optional): 0 = Left, 1 = Center, 2 = Right. Defaults to 0.
+            c (int, optional): Color to render text in. Characters are erased with the opposite color. Defaults to 1.
+        """
+        self._display = display
+        self.x = x
+        self.y = y
+        self.font_name = font_name
+        self.max_width = max_width
+        self.horiz_align = horiz_align
+        self.c = c
+        self.text = ''
+        self.rect = None        # Area (x, y, w, h) the readout was last rendered in
+        self._changed = True
+        self._cells = []        # (x, character, width) of each character last rendered
+        self._widths = {}
+        self.height = 0
+        previous_font = display.selected_font
+        display.select_font(font_name)
+        for char in charset:
+            self._widths[char], height = display.get_text_size(char)
+            self.height = max(self.height, height)
+        display.select_font(previous_font)
+        widths = set(width for char, width in self._widths.items() if '0' <= char <= '9')
+        self.advance = widths.pop() if len(widths) == 1 else 0      # Width of every digit in a fixed advance font, otherwise 0
+
+    def set_text(self, text):
+        """Change the text of the readout. Only the characters which have changed are redrawn by the next call to draw().
+
+        Args:
+            text (string): The new text. Other values (e.g. numbers) are converted to a string.
+        """
+        text = str(text)
+        if text != self.text:
+            self.text = text
+            self._changed = True
+
+    def invalidate(self):
+        """Force the whole readout to be redrawn by the next call to draw() (e.g. after the display has been cleared)."""
+        self._cells = []
+        self.rect = None
+        self._changed = True
+
+    def draw(self):
+        """Erase and redraw the characters of the readout which have changed.
+
+        Returns:
+            (int, int, int, int): The changed area (x, y, w, h) of the display, or None if nothing changed.
+        """
+        if not self._changed:
+            return None
+        self._changed = False
+        display = self._display
+        cells = self._layout(self.text)
+        changed = None
+        for cell in self._cells:
+            if not cell in cells:
+                display.fill_rect(cell[0], self.y, cell[2], self.height, 1 - self.c)
+                changed = self._mark_dirty(changed, cell)
+        previous_font = display.selected_font
+        display.select_font(self.font_name)
+        for cell in cells:
+            if not cell in self._cells:
+                display.text(cell[1], cell[0], self.y, c=self.c)
+                changed = self._mark_dirty(changed, cell)
+        display.select_font(previous_font)
+        self._cells = cells
+        self.rect = (cells[0][0], self.y, cells[-1][0] + cells[-1][2] - cells[0][0], self.height) if cells else None
+        return changed
+
+    def _layout(self, text):
+        """ Return the (x, character, width) of each character of the text."""
+        advance = self.advance
+        if advance:
+            # Digits have a fixed advance, so only the other characters need to be measured
+            widths = [advance if '0' <= char <= '9' else self._char_width(char) for char in text]
+        else:
+            widths = [self._char_width(char) for char in text]
+        x = self.x
+        if self.max_width > 0:
+            width = sum(widths)
+            if self.horiz_align == 1:     # Center
+                x += int((self.max_width - width) / 2)
+            elif self.horiz_align == 2:   # Right
+                x += self.max_width - width
+        cells = []
+        for i, char in enumerate(text):
+            cells.append((x, char, widths[i]))
+            x += widths[i]
+        return cells
+
+    def _char_width(self, char):
+        width = self._widths.get(char)
+        if width is None:   # Not in the charset
+            display = self._display
+            previous_font = display.selected_font
+            display.select_font(self.font_name)
+            width = self._widths[char] = display.get_text_size(char)[0]
+            display.select_font(previous_font)
+        return width
+
+    def _mark_dirty(self, changed, cell):
+        self._display.mark_dirty(cell[0], self.y, cell[2], self.height)
+        return _union(changed, (cell[0], self.y, cell[2], self.height))
+
+class Sprite:
+    def __init__(self, display, x, y, font_name, frames, interval_ms=100, restore_background=False, c=1):
+        """Create a sprite which animates by cycling through characters of an icon font (e.g. a spinner). The sprite is drawn by the first call to draw().
+
+        Args:
+            display (Enhanced_Display): The display to render the sprite on.
+            x (int): X coordinate of the sprite.
+            y (int): Y coordinate of the sprite.
+            font_name (string): Name of the packed icon font.
+            frames (string): The characters containing each frame of the animation, in order.
+            interval_ms (int, optional): Time each frame is shown for in milliseconds. Defaults to 100.
+            restore_background (bool, optional): False = draw each frame with XOR and erase it by drawing it again with XOR, which preserves anything underneath.
+                                                 True = save the background under the sprite when it is first drawn and restore it to erase each frame,
+                                                 so frames are drawn in color c. Defaults to False.
+            c (int, optional): Color to render the frames in when restoring the background. Defaults to 1.
+        """
+        self._display = display
+        self.x = x
+        self.y = y
+        self.font_name = font_name
+        self.frames = frames
+        self.interval_ms = interval_ms
+        self.restore_background = restore_background
+        self.c = c
+        self.frame = 0          # Index of the current frame
+        self.running = True
+        previous_font = display.selected_font
+        display.select_font(font_name)
+        sizes = [display.get_text_size(frame) for frame in frames]
+        display.select_font(previous_font)
+        self.rect = (x, y, max(size[0] for size in sizes), max(size[1] for size in sizes))
+        self._background = None
+        self._frame_ticks = 0   # Time the current frame was drawn
+        self._drawn = False     # True when the current frame is on the display
+
+    def invalidate(self):
+        """Force the current frame to be drawn by the next call to draw(), without erasing the previous frame (e.g. after the display has been cleared)."""
+        self._drawn = False
+
+    def draw(self):
+        """Advance to the next frame once the current frame has been shown for the frame interval, erasing the previous frame.
+
+        Returns:
+            (int, int, int, int): The changed area (x, y, w, h) of the display, or None if nothing changed.
+        """
+        now = ticks_ms()
+        if self._drawn:
+            if not self.running or ticks_diff(now, self._frame_ticks) < self.interval_ms:
+                return None
+            self._erase_frame()
+            self.frame = (self.frame + 1) % len(self.frames)
+        elif self.restore_background:
+            self._save_background()
+        self._frame_ticks = now
+        self._draw_frame(XOR if not self.restore_background else TRANSPARENT)
+        self._drawn = True
+        return self._mark_dirty()
+
+    def erase(self):
+        """Remove the sprite from the display. The next call to draw() draws the current frame again.
+
+        Returns:
+            (int, int, int, int): The changed area (x, y, w, h) of the display, or None if nothing changed.
+        """
+        if not self._drawn:
+            return None
+        self._erase_frame()
+        self._drawn = False
+        return self._mark_dirty()
+
+    def _erase_frame(self):
+        if self.restore_background:
+            if self._background:
+                self._display.blit(self._background, self.x, self.y)
+        else:
+            self._draw_frame(XOR)
+
+    def _save_background(self):
+        if self._display.buffer is None:
+            return      # Display not present
+        x, y, width, height = self.rect
+        self._background = Bitmap(width, height)
+        blit(self._background, self._display, -x, -y)     # Copy the area under the sprite out of the frame buffer
+
+    def _draw_frame(self, mode):
+        display = self._display
+        previous_font = display.selected_font
+        display.select_font(self.font_name)
+        display.text(self.frames[self.frame], self.x, self.y, c=self.c, mode=mode)
+        display.select_font(previous_font)
+
+    def _mark_dirty(self):
+        x, y, width, height = self.rect
+        self._display.mark_dirty(x, y, width, height)
+        return self.rect
+
+def draw_widgets(widgets):
+    """Draw each widget whose content has changed.
+
+    Args:
+        widgets (list[Label, NumericReadout or Sprite]): The widgets to draw.
+
+    Returns:
+        (int, int, int, int): The area (x, y, w, h) containing all changes, or None if nothing changed.
+    """
+    changed = None
+    for widget in widgets:
+        changed = _union(changed, widget.draw())
+    return changed